@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Downloads the subtitles of many films at once, given their titles or IMDb ids.
+Films are downloaded by a bounded pool of threads, requests to each host are spaced out by a rate limit,
+and a failed film is retried with a growing delay. The result of each film is recorded in a manifest file,
+so a stopped batch is resumed by running it again, skipping films already downloaded.
+
+usage: python3 -m film_processing.batch_download [titles file] [--jobs N] [--rate R] [--retries N]
+	[--language L] [--manifest path] [--ingest]
+"""
+
+#imports
+import sys
+import os
+import re
+import json
+import time
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+import network
+import metadata
+import film_data
+from subscene import subscene
+
+# Path to the manifest recording the result of each film
+MANIFEST_PATH = film_data.SUB_FILES_DIR + "/batch_manifest.jsonl"
+
+# Number of films downloaded at once
+JOBS = 4
+
+# Requests per second sent to each host
+RATE = 2.0
+
+# Times a film is tried again after an error, waiting RETRY_DELAY * 2 ** (retry - 1) seconds before each
+RETRIES = 2
+RETRY_DELAY = 5
+
+# Statuses of films which are not run again when a batch is resumed
+FINISHED = ("done", "not_found", "no_subtitle", "duplicate")
+
+IMDB_ID = re.compile(r"(tt)?[0-9]{7,8}")
+
+class Manifest():
+	"""
+	Records the result of each film as a line of json, the last line of a film is its current state.
+	Lines are only appended, so a batch stopped at any point loses at most the line being written
+	"""
+
+	def __init__(self, path=MANIFEST_PATH):
+		"""
+		:param1 path: String, path to the manifest file, created if it does not exist
+		"""
+		self.path = path
+		self.entries = {}
+		# IMDb id of each film downloaded or being downloaded, to the query which holds it
+		self.films = {}
+		self.lock = threading.Lock()
+		if os.path.isfile(path):
+			with open(path, encoding="utf-8") as f:
+				for line in f:
+					try:
+						entry = json.loads(line)
+					except ValueError:
+						# A line cut off by a stopped batch
+						continue
+					self.entries[entry['query']] = entry
+		for query, entry in self.entries.items():
+			if (entry['status'] == "done"):
+				self.films[entry['imdbid']] = query
+		self.file = open(path, "a", encoding="utf-8")
+
+	def finished(self, query):
+		"""
+		:returns: Boolean, True if query does not need to be run again
+		"""
+		return self.entries.get(query, {}).get('status') in FINISHED
+
+	def claim(self, imdbid, query):
+		"""
+		Reserves a film for query, so two queries for the same film do not download it twice
+		:param1 imdbid: String, IMDb id of the film
+		:param2 query: String
+		:returns: String, the query already holding the film, None if query now holds it
+		"""
+		with self.lock:
+			owner = self.films.setdefault(imdbid, query)
+		return None if (owner == query) else owner
+
+	def release(self, imdbid, query):
+		"""
+		Frees a film claimed by query, after its download failed
+		"""
+		with self.lock:
+			if (self.films.get(imdbid) == query):
+				del self.films[imdbid]
+
+	def record(self, query, status, **fields):
+		"""
+		:param1 query: String
+		:param2 status: String, one of FINISHED or "failed"
+		:param3 fields: Further values to record, such as imdbid, title, or error
+		:returns: Dictionary, the entry recorded
+		"""
+		entry = dict(query=query, status=status, time=time.time(), **fields)
+		with self.lock:
+			self.entries[query] = entry
+			self.file.write(json.dumps(entry) + "\n")
+			self.file.flush()
+		return entry
+
+	def close(self):
+		self.file.close()
+
+def is_imdb_id(query):
+	"""
+	:returns: Boolean, True if query is an IMDb id in form '#######' or 'tt#######' rather than a title
+	"""
+	return IMDB_ID.fullmatch(query) is not None
+
+def download(query, manifest, limiter, language="english", retries=RETRIES, timeout=network.DEFAULT_TIMEOUT, cancel=None, ingest=False):
+	"""
+	Finds a film and downloads its subtitle, trying again after errors
+	:param1 query: String, a title or IMDb id
+	:param2 manifest: Manifest, the result is recorded to it
+	:param3 limiter: network.RateLimiter, waited on before IMDb requests, which do not use the subscene session
+	:param4 language: String, desired language of subtitle
+	:param5 retries: Integer, times the film is tried again after an error
+	:param6 timeout: Number of seconds to wait for each response
+	:param7 cancel: network.CancelToken, network.Cancelled is raised once it is cancelled
+	:param8 ingest: Boolean, if True the word_db of the film is generated as it is downloaded, see film_data.download_film()
+	:returns: Dictionary, the entry recorded to the manifest
+	"""
+	attempt = 0
+	while True:
+		attempt += 1
+		imdbid = None
+		try:
+			if is_imdb_id(query):
+				url = film_data.fixIMDBurl("https://www.imdb.com/title/tt" + query.replace("tt", ""))
+				if metadata.lookup(film_data.get_IMDB_ID(url)) is None:
+					limiter.wait("www.imdb.com")
+				info = film_data.search_for_imdb_id(query, language, timeout, cancel)
+			else:
+				info = film_data.search_for_movie(query, language, timeout, cancel)
+			if info is None:
+				return manifest.record(query, "not_found", attempts=attempt)
+			imdbid = film_data.get_IMDB_ID(film_data.fixIMDBurl(info['url']))
+			owner = manifest.claim(imdbid, query)
+			if owner is not None:
+				return manifest.record(query, "duplicate", attempts=attempt, imdbid=imdbid, title=info['title'], of=owner)
+			film_data.download_film(info, query, language, timeout, cancel, ingest=ingest)
+			return manifest.record(query, "done", attempts=attempt, imdbid=imdbid, title=info['title'])
+		except network.Cancelled:
+			if imdbid is not None:
+				manifest.release(imdbid, query)
+			raise
+		except film_data.AppError as e:
+			# The film has no subtitle in language, trying again would not change that
+			manifest.release(imdbid, query)
+			return manifest.record(query, "no_subtitle", attempts=attempt, imdbid=imdbid, error=str(e))
+		except Exception as e:
+			if imdbid is not None:
+				manifest.release(imdbid, query)
+			if (attempt > retries):
+				return manifest.record(query, "failed", attempts=attempt, error=type(e).__name__ + ": " + str(e))
+			delay = RETRY_DELAY * 2 ** (attempt - 1)
+			if cancel is not None:
+				cancel.sleep(delay)
+			else:
+				time.sleep(delay)
+
+def download_all(queries, language="english", jobs=JOBS, rate=RATE, retries=RETRIES, manifest_path=MANIFEST_PATH,
+	timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None, ingest=False):
+	"""
+	Downloads the subtitles of many films at once, skipping films finished by an earlier run with the same manifest
+	:param1 queries: A list of titles or IMDb ids
+	:param2 language: String, desired language of subtitles
+	:param3 jobs: Integer, number of films downloaded at once
+	:param4 rate: Number of requests per second sent to each host
+	:param5 retries: Integer, times a film is tried again after an error
+	:param6 manifest_path: String, path to the manifest file
+	:param7 timeout: Number of seconds to wait for each response
+	:param8 cancel: network.CancelToken, stops the batch once cancelled. Unfinished films are run again on the next run
+	:param9 progress: Function accepting a string, called as each film finishes
+	:param10 ingest: Boolean, if True the word_db of each film is generated as it is downloaded
+	:returns: Dictionary of manifest entries by query, see Manifest.record(). Films stopped by cancelling are left out
+	"""
+	cancel = cancel or network.CancelToken()
+	os.makedirs(film_data.SUB_FILES_DIR + "/srt", exist_ok=True)
+	manifest = Manifest(manifest_path)
+	results = {}
+	pending = []
+	for query in dict.fromkeys(query.strip() for query in queries):
+		if manifest.finished(query):
+			results[query] = manifest.entries[query]
+		elif query:
+			pending.append(query)
+
+	# Each thread gets its own pooled connection. The limiter is installed before the response cache,
+	# so cached responses are answered without waiting
+	pool_size = subscene.POOL_SIZE
+	limiter = network.RateLimiter(rate)
+	subscene.session_hooks.insert(0, limiter.install)
+	subscene.configure_session(pool_size=jobs)
+	executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="batch")
+	try:
+		futures = {executor.submit(download, query, manifest, limiter, language, retries, timeout, cancel, ingest): query for query in pending}
+		for n, future in enumerate(as_completed(futures), 1):
+			try:
+				entry = future.result()
+			except network.Cancelled:
+				continue
+			results[futures[future]] = entry
+			network.report(progress, "[{}/{}] {}: {}".format(n, len(pending), futures[future], entry['status']))
+	except BaseException:
+		cancel.cancel()
+		raise
+	finally:
+		executor.shutdown(wait=True, cancel_futures=True)
+		subscene.session_hooks.remove(limiter.install)
+		subscene.configure_session(pool_size=pool_size)
+		manifest.close()
+	return results
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Download the subtitles of many films at once")
+	parser.add_argument("titles", nargs="?", default="-", help="file with a title or IMDb id on each line, standard input if -")
+	parser.add_argument("--jobs", "-j", type=int, default=JOBS, help="number of films downloaded at once")
+	parser.add_argument("--rate", type=float, default=RATE, help="requests per second sent to each host")
+	parser.add_argument("--retries", type=int, default=RETRIES, help="times a film is tried again after an error")
+	parser.add_argument("--language", "-l", default="english", help="desired language of subtitles")
+	parser.add_argument("--manifest", default=MANIFEST_PATH, help="file recording the result of each film, to resume from")
+	parser.add_argument("--ingest", action="store_true", help="generate the word_db of each film from the downloaded copy")
+	args = parser.parse_args(argv)
+
+	if (args.titles == "-"):
+		lines = sys.stdin.read().splitlines()
+	else:
+		with open(args.titles, encoding="utf-8") as f:
+			lines = f.read().splitlines()
+	queries = [line for line in lines if line.strip() and not line.startswith("#")]
+
+	try:
+		results = download_all(queries, args.language, args.jobs, args.rate, args.retries, args.manifest,
+			progress=print, ingest=args.ingest)
+	except KeyboardInterrupt:
+		print("Stopped, run again with the same manifest to resume")
+		return 1
+	counts = {}
+	for entry in results.values():
+		counts[entry['status']] = counts.get(entry['status'], 0) + 1
+	print(", ".join("{} {}".format(count, status) for status, count in sorted(counts.items())))
+	return 1 if ("failed" in counts) else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -2,16 +2,43 @@
 
 #imports
 import sys
-import os 								# Used for writing and removing zip files
+import os 								# Used for writing extracted subtitle files
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
 import imdb 							# Used for gathering information about films, year, title, director, and runtime
 from imdb.Movie import Movie
 from imdb.Person import Person
 import shutil
 # from imdb.helpers import get_byURL 	# Allows for access to IMDB Objects through imdb url, currently unused
 import zipfile 							# Used for unzipping downloaded zip files from subscene
-from subscene.subscene import search 	# Used for collceting zip files containing subtitles from subscene.com
-import cfscrape							# Used for bypassing subscene.com Clouflare DDOS protection
+import tempfile							# Used for holding downloaded zip files in memory
+import threading						# Used for searching subscene and IMDb at once
+from subscene.subscene import search_all, get_session, session_hooks 	# Used for collceting zip files containing subtitles from subscene.com
+import network							# Used for running requests off the user interface thread, with timeouts and cancelling
+import http_cache						# Used for answering repeated subscene requests locally
+import metadata							# Used for answering repeated IMDb lookups locally
+import sub_processing.srt_parsing as srtp	# Used for generating the word_db of a downloaded subtitle from memory
+
+# Subscene pages are read from the response cache when possible
+session_hooks.append(http_cache.install)
+
+# Number of bytes of a zip file downloaded between checks for cancelling
+DOWNLOAD_CHUNK_SIZE = 8192
+
+# Bytes of a downloaded zip file held in memory, a larger file is moved to a temporary file as it downloads
+ZIP_SPOOL_SIZE = 16 * 1024 * 1024
+
+# Holds extracted srt files, found from this file so any working directory may be used
+SUB_FILES_DIR = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files"
+
+# Number of subscene search results checked for a film matching an IMDb id
+IMDB_ID_CANDIDATES = 3
+
+class AppError(Exception):
+	"""
+	Raised when a subtitle can not be found or downloaded
+	"""
+	pass
 
 #IMDB FUNCTIONS
 def search_movie(searchMovie):
@@ -22,8 +49,8 @@ def search_movie(searchMovie):
 	:param1 searchMovie: an string, user inputted search key for a film
 	:returns: a movie object, the first result by searching IMDb with searchMovie
 	"""
-	ia = imdb.IMDb()
-	movies = ia.search_movie(searchMovie)
+	with metadata.fetch_lock:
+		movies = metadata.get_access().search_movie(searchMovie)
 	return movies[0]
 
 def get_IMDB_ID(url):
@@ -38,12 +65,18 @@ def get_IMDB_ID(url):
 	return imdbid
 
 def fixIMDBurl(url):
+    """
+    Pads the IMDb id of a url with zeros to at least 7 digits. Newer films have 8 digit ids, which are left unchanged
+    ex) https://www.imdb.com/title/tt133093 -> https://www.imdb.com/title/tt0133093
+    :param1 url: URL to IMDb page, https://www.imdb.com/title/tt[IMDbID]
+    :returns: string, the url with a padded IMDb id
+    """
     split_url = url.split("/")
     split_id = split_url[-1]
-    if (len(split_id) == 9):
+    if (len(split_id) >= 9):
         return url
     else:
-        while(len(split_id) != 9):
+        while(len(split_id) < 9):
             split_id = split_id[:2] + "0" + split_id[2:]
         new_url = ""
         for i in range(len(split_url) - 1):
@@ -59,40 +92,131 @@ def get_movie_info(url):
 	:param1 url: imdb url of movie
 	:returns: Title, Release Year, Director, Runtime, ... as strings
 	""" 
-	ia = imdb.IMDb()
-	movie = ia.get_movie(get_IMDB_ID(fixIMDBurl(url)))
-	ia.update(movie)
-	return {
-        'title': movie['title'],
-        'year': str(movie['year']) ,
-        'director': str(movie['director'][0]['name']),
-        'cast' : str(movie['cast'][0]['name']) + ", " + str(movie['cast'][1]['name']) + ", " + str(movie['cast'][2]['name']),
-        'runtime': str(movie['runtime'])
-    }
+	# A film seen before is read from the metadata database, without using the network
+	return metadata.get_info(get_IMDB_ID(fixIMDBurl(url)))
 
 # SUBSCENE FUNCTIONS
-def search_for_movie(searchMovie, language="english"):
+def search_for_movie(searchMovie, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None):
 	"""
 	Searches for a movie on subspace, returns information about the film for user checking
 	:param1 searchMovie: String representing search term for movie
-	:returns: dictionary containing title, year, and url
-	"""
-	film = search(searchMovie, language)
-	if film is None:
-		# Last paramater dictates type of search, close search. see subscene.py
-		film = search(searchMovie, language, 4)
-	if film is None:
-		# Last paramater dictates type of search, popular search. see subscene.py
-		film = search(searchMovie, language, 3)
-	if film is None:
-		return film
-	else:
-		return {
-	        'title': film.title,
-	        'year': film.year,
-	        'subtitles': film.subtitles,
-	        'url': film.imdb
-	    }
+	:param2 language: String, desired language of subtitle
+	:param3 timeout: Number of seconds to wait for each response
+	:param4 cancel: network.CancelToken, checked between requests. network.Cancelled is raised once it is cancelled
+	:param5 progress: Function accepting a string, called before each request
+	:returns: dictionary containing title, year, and url of the best match, and candidates, a list of every
+				film found from best to worst match, see subscene.search_all()
+	"""
+	network.report(progress, "Searching subscene for \"" + searchMovie + "\"")
+	# The exact, close, and popular results all come from one results page
+	candidates = search_all(searchMovie, language, timeout)
+	network.check(cancel)
+	if not candidates:
+		return None
+	network.report(progress, "Loading \"" + candidates[0].title + "\"")
+	film = candidates[0].film(timeout)
+	network.check(cancel)
+	return {
+		'title': film.title,
+		'year': film.year,
+		'subtitles': film.subtitles,
+		'url': film.imdb,
+		'candidates': candidates
+	}
+
+def get_film_info(searchMovie, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None, partial=None):
+	"""
+	Searches for a movie on subscene, then collects its information from IMDb using the url found on subscene.
+	IMDb is searched for the same title at once on another network thread, and its first result is collected
+	while subscene is searched. Once subscene answers, the film it found is used, which is usually the one already collected
+	:param1 searchMovie: String representing search term for movie
+	:param2 language: String, desired language of subtitle
+	:param3 timeout: Number of seconds to wait for each subscene response
+	:param4 cancel: network.CancelToken, checked between requests
+	:param5 progress: Function accepting a string, called before each request
+	:param6 partial: Function accepting a dictionary in the format returned, called with the information found so far
+	as each search finishes. return['imdb'] is the first IMDb result until subscene has answered, then only the film found on subscene
+	:returns: Dictionary with return['subscene'], output of search_for_movie() with a fixed imdb url, and
+				return['imdb'], output of get_movie_info() or None if it could not be found. None if the film was not found
+	"""
+	# Results found so far by either thread, no partial results are passed on once finished is set
+	found = {'subscene': None, 'guess': None, 'finished': False}
+	found_lock = threading.Lock()
+
+	def update(key, value):
+		with found_lock:
+			found[key] = value
+			if (partial is None) or found['finished']:
+				return
+			subscene_info = found['subscene']
+			guess = found['guess']
+			imdb_info = None
+			if (guess is not None) and ((subscene_info is None) or (guess[0] == get_IMDB_ID(subscene_info['url']))):
+				imdb_info = guess[1]
+			partial({'subscene': subscene_info, 'imdb': imdb_info})
+
+	def guess_film():
+		imdbid = metadata.search(searchMovie)
+		with found_lock:
+			# Subscene may have answered with another film, which is collected instead
+			if (imdbid is None) or found['finished'] or ((found['subscene'] is not None) and (get_IMDB_ID(found['subscene']['url']) != imdbid)):
+				return
+		update('guess', (imdbid, metadata.get_info(imdbid)))
+
+	imdb_search = network.submit(guess_film)
+	try:
+		subscene_info = search_for_movie(searchMovie, language, timeout, cancel, progress)
+		if subscene_info is None:
+			return None
+		# Subscene movie information often includes a broken imdb url
+		subscene_info['url'] = fixIMDBurl(subscene_info['url'])
+		update('subscene', subscene_info)
+		network.report(progress, "Collecting IMDb information")
+		# If the IMDb search is collecting the same film, this waits for it rather than collecting it again
+		try:
+			imdb_info = get_movie_info(subscene_info['url'])
+		except Exception:
+			print("IMDB Info could not be found")
+			imdb_info = None
+		network.check(cancel)
+		return {'subscene': subscene_info, 'imdb': imdb_info}
+	finally:
+		imdb_search.cancel()
+		with found_lock:
+			found['finished'] = True
+
+def search_for_imdb_id(imdbid, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None):
+	"""
+	Finds a film on subscene by its IMDb id, searching subscene for the title IMDb gives the film
+	:param1 imdbid: String, IMDb id in form '#######' or 'tt#######'
+	:param2 language: String, desired language of subtitle
+	:param3 timeout: Number of seconds to wait for each response
+	:param4 cancel: network.CancelToken, checked between requests
+	:param5 progress: Function accepting a string, called before each request
+	:returns: output of search_for_movie() for the search result with a matching IMDb id, None if none match
+	"""
+	url = fixIMDBurl("https://www.imdb.com/title/tt" + imdbid.replace("tt", ""))
+	network.report(progress, "Collecting IMDb information")
+	title = get_movie_info(url)['title']
+	network.check(cancel)
+	network.report(progress, "Searching subscene for \"" + title + "\"")
+	candidates = search_all(title, language, timeout)
+	network.check(cancel)
+	for candidate in candidates[:IMDB_ID_CANDIDATES]:
+		if candidate.url is None:
+			continue
+		network.report(progress, "Loading \"" + candidate.title + "\"")
+		film = candidate.film(timeout)
+		network.check(cancel)
+		if film.imdb and (get_IMDB_ID(fixIMDBurl(film.imdb)) == get_IMDB_ID(url)):
+			return {
+				'title': film.title,
+				'year': film.year,
+				'subtitles': film.subtitles,
+				'url': film.imdb,
+				'candidates': candidates
+			}
+	return None
 
 def get_lang_from_url(url):
 	"""
@@ -114,54 +238,115 @@ def get_lang_from_url(url):
 		i += 1
 	return language
 
-def find_download_subtitle(subtitles, language="english", title="MOVIE"):
+def find_download_subtitle(subtitles, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None):
 	"""
-	Finds a subtitle file in language from imdb url and downloads it to ./../sub_files
-	:param1 subtitles: list of Subtitle objects from subscene
+	Finds a subtitle file in language and downloads its zip file into memory
+	:param1 subtitles: subscene.Subtitles, the subtitles of a film
 	:param2 language: desired language of subtitle, default english
-	:param3 title: title of film, used for filepath
-	:returns: index in subtitle list of downloaded subtitle, -1 if failed
+	:param3 timeout: Number of seconds to wait for each response
+	:param4 cancel: network.CancelToken, checked between requests and while downloading.
+	network.Cancelled is raised once it is cancelled
+	:param5 progress: Function accepting a string, called before each request and as the file downloads
+	:returns: A file object holding the zip file, read from its start. None if there is no subtitle in language
 	"""
-	downloaded = False
-	i = 0
-	while not downloaded:
-		i += 1
-		if (get_lang_from_url(subtitles[i].url) == language):
-			downloaded = True
-	if (downloaded):
-		scraper = cfscrape.create_scraper()
-		url = subtitles[i].zipped_url
-		r = scraper.get(url)
-		path = './../../sub_files/zip/' + title + '_sub.zip'
-		with open(path, 'wb') as f:
-			f.write(r.content)
-		return i
-	return -1
+	# Rows in other languages are skipped without being read
+	for subtitle in subtitles.in_language(language):
+		network.report(progress, "Finding subtitle download")
+		url = subtitle.get_zipped_url(timeout)
+		network.check(cancel)
+		# The zip is read as it arrives, so the download can be cancelled part way through.
+		# The shared session reuses the connection and Cloudflare cookies of the search
+		zip_file = tempfile.SpooledTemporaryFile(ZIP_SPOOL_SIZE)
+		try:
+			with get_session().get(url, timeout=timeout, stream=True) as r:
+				r.raise_for_status()
+				for chunk in r.iter_content(DOWNLOAD_CHUNK_SIZE):
+					network.check(cancel)
+					zip_file.write(chunk)
+					network.report(progress, "Downloading subtitle: {:,} KB".format(zip_file.tell() // 1024))
+		except BaseException:
+			zip_file.close()
+			raise
+		zip_file.seek(0)
+		return zip_file
+	return None
 
 def unzip_file(path, num="0000000"):
 	"""
-	Unzips downloaded subtitle file, renames subtitle file accordingly
-	:param1 path: string path to zip flie
+	Extracts the .srt files of a subtitle zip file to sub_files/srt/[num], any other files are skipped.
+	Files in folders of the zip file are extracted into the one directory
+	:param1 path: string path to zip file, or a file object holding it
 	:param2 num: string 00000 by default, imdid id of a file
-	:returns: Dictionary object to paths to srt directory, path to word list text file, and path to word count text file
+	:returns: A list of tuples (path to srt file, its contents as bytes), in the order they are stored
 	"""
-	zippo = zipfile.ZipFile(path, 'r')
-	zippo.extractall("./../../sub_files/srt/" + num + "/")
-	zippo.close()
+	directory = SUB_FILES_DIR + "/srt/" + num
+	os.makedirs(directory, exist_ok=True)
+	extracted = []
+	names = set()
+	with zipfile.ZipFile(path, 'r') as zippo:
+		for member in zippo.infolist():
+			name = os.path.basename(member.filename)
+			# Folders, and the copies of file attributes made by macOS, are not subtitles
+			if member.is_dir() or (not name.lower().endswith(".srt")) or name.startswith("._"):
+				continue
+			# A file sharing its name with one in another folder is named after its folder too
+			if name in names:
+				name = member.filename.replace("/", "_")
+			names.add(name)
+			data = zippo.read(member)
+			with open(directory + "/" + name, 'wb') as f:
+				f.write(data)
+			extracted.append((directory + "/" + name, data))
+	return extracted
 
-def get_sub_files(searchMovie, language="english"):
+def get_sub_files(searchMovie, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None, ingest=True):
 	"""
 	Finds and downloads a subtitle file using the searchMovie and language, default english
 	:param1 searchMovie: string representing title of movie to search for
 	:param2 language: string representing desired language of subtitle
+	:param3 timeout: Number of seconds to wait for each response
+	:param4 cancel: network.CancelToken, see find_download_subtitle()
+	:param5 progress: Function accepting a string, called as each step starts
+	:param6 ingest: Boolean, see download_film()
+	:returns: String, IMDb id of the film, its subtitle is extracted to sub_files/srt/[IMDb id]
+	"""
+	info = search_for_movie(searchMovie, language, timeout, cancel, progress)
+	if info is None:
+		raise AppError('Searched Movie \"' + searchMovie + '\" Could Not Be Found.')
+	return download_film(info, searchMovie, language, timeout, cancel, progress, ingest)
+
+def download_film(info, searchMovie, language="english", timeout=network.DEFAULT_TIMEOUT, cancel=None, progress=None, ingest=False):
+	"""
+	Downloads and extracts a subtitle of a film found with search_for_movie() or search_for_imdb_id()
+	:param1 info: Dictionary, output of search_for_movie()
+	:param2 searchMovie: String, the search the film was found with, used for error messages
+	:param3 language: string representing desired language of subtitle
+	:param4 timeout: Number of seconds to wait for each response
+	:param5 cancel: network.CancelToken, see find_download_subtitle()
+	:param6 progress: Function accepting a string, called as each step starts
+	:param7 ingest: Boolean, if True the word_db of the first srt file is generated from the downloaded copy,
+	so opening the file does not read and tokenize it again
+	:returns: String, IMDb id of the film, its subtitle is extracted to sub_files/srt/[IMDb id]
 	"""
-	info = search_for_movie(searchMovie, language)
-	i = find_download_subtitle(info['subtitles'], language, info['title'])
-	if (i == -1):
+	imdbid = get_IMDB_ID(fixIMDBurl(info['url']))
+	zip_file = find_download_subtitle(info['subtitles'], language, timeout, cancel, progress)
+	if zip_file is None:
 		raise AppError('Searched Movie \"' + searchMovie + '\" Failed to Download.')
-	else:
-		path_dict = unzip_file("./../../sub_files/zip/" + info['title'] + "_sub.zip", get_IMDB_ID(fixIMDBurl(info['url'])))
-		os.remove("./../../sub_files/zip/" + info['title'] + "_sub.zip")
+	network.report(progress, "Extracting subtitle")
+	with zip_file:
+		extracted = unzip_file(zip_file, imdbid)
+	if not extracted:
+		raise AppError('Searched Movie \"' + searchMovie + '\" Has No Subtitle File.')
+	network.check(cancel)
+	if ingest:
+		network.report(progress, "Reading subtitle")
+		path, data = extracted[0]
+		# Words are counted in the same progress messages, and cancelling stops writing them
+		def report_words(cues, words):
+			network.report(progress, "Reading subtitle: %d subtitles, %d words" % (cues, words))
+		srtp.gen_word_db(srtp.iter_srt_bytes(data), imdbid, source=srtp.describe_source(path, data),
+			progress=report_words, cancel=cancel)
+	return imdbid
 
 def clean_sub_dir():
 	for dirname in os.listdir(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/srt"):
@@ -169,4 +354,6 @@ def clean_sub_dir():
 	for dirname in os.listdir(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/db"):
 		shutil.rmtree(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/db/" + dirname)
 	for dirname in os.listdir(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/png"):
-		shutil.rmtree(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/png/" + dirname)
\ No newline at end of file
+		shutil.rmtree(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/png/" + dirname)
+	if (os.path.isfile(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/corpus.db")):
+		os.remove(os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/corpus.db")
\ No newline at end of file
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+A persistent cache of HTTP responses, so repeated searches are answered without the network.
+Responses are kept in a sqlite database, keyed by method, url, and request body. A response is used
+without asking the server until it is older than the TTL of its host. After that it is revalidated with
+its ETag or Last-Modified date, and a 304 Not Modified response renews it.
+When the cache grows past its size cap, the least recently used responses are removed.
+
+In offline mode only the cache is read, any request it can not answer fails with OfflineError.
+This gives reproducible runs against previously recorded responses.
+"""
+
+#imports
+import os
+import io
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Path to the cache database file
+CACHE_PATH = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/http_cache.db"
+
+# Seconds a response is used before it is revalidated, by host. Subdomains use the TTL of their domain
+HOST_TTLS = {
+	'subscene.com': 6 * 60 * 60,
+	'imdb.com': 7 * 24 * 60 * 60
+}
+DEFAULT_TTL = 60 * 60
+
+# Total bytes of response bodies kept, older responses are removed past this size
+MAX_SIZE = 64 * 1024 * 1024
+
+# Setting HTTP_CACHE_OFFLINE=1 starts the cache in offline mode
+OFFLINE = os.environ.get("HTTP_CACHE_OFFLINE", "") not in ("", "0")
+
+# Created on first use by get_cache()
+cache = None
+cache_lock = threading.Lock()
+
+class OfflineError(requests.exceptions.ConnectionError):
+	"""
+	Raised in offline mode for a request the cache can not answer
+	"""
+	pass
+
+class ResponseCache():
+
+	def __init__(self, path=CACHE_PATH, max_size=MAX_SIZE, host_ttls=HOST_TTLS, offline=OFFLINE):
+		"""
+		:param1 path: String, path to the cache database file
+		:param2 max_size: Integer, bytes of response bodies kept
+		:param3 host_ttls: Dictionary, seconds a response is fresh for each host, see HOST_TTLS
+		:param4 offline: Boolean, if True the network is never used
+		"""
+		self.path = path
+		self.max_size = max_size
+		self.host_ttls = host_ttls
+		self.offline = offline
+		if not (os.path.isdir(os.path.dirname(path))):
+			os.makedirs(os.path.dirname(path))
+		conn = self.connect()
+		conn.execute('''CREATE TABLE IF NOT EXISTS responses
+			(key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, headers TEXT NOT NULL,
+			body BLOB NOT NULL, size INTEGER NOT NULL, stored REAL NOT NULL, accessed REAL NOT NULL)''')
+		# Lists responses from least to most recently used, for eviction
+		conn.execute('''CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)''')
+		conn.close()
+
+	def connect(self):
+		"""
+		Opens the cache database, each thread uses its own connection
+		:returns: A sqlite3 connection in autocommit mode
+		"""
+		conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+		# Readers are not blocked by a thread storing a response
+		conn.execute('''PRAGMA journal_mode = WAL''')
+		return conn
+
+	def key(self, method, url, body=None):
+		"""
+		:param1 method: String, HTTP method
+		:param2 url: String
+		:param3 body: Bytes, string, or None, the request body
+		:returns: String, the key of a request
+		"""
+		if isinstance(body, str):
+			body = body.encode("utf-8")
+		return hashlib.blake2b(method.upper().encode("utf-8") + b" " + url.encode("utf-8") + b"\n" + (body or b"")).hexdigest()
+
+	def ttl(self, url):
+		"""
+		:param1 url: String
+		:returns: Number of seconds responses from the url's host are fresh for
+		"""
+		host = urlsplit(url).hostname or ""
+		for domain, ttl in self.host_ttls.items():
+			if (host == domain) or host.endswith("." + domain):
+				return ttl
+		return DEFAULT_TTL
+
+	def lookup(self, key):
+		"""
+		Finds a cached response, marking it as recently used
+		:param1 key: String, output of key()
+		:returns: Dictionary with return['url'], return['status'], return['headers'], return['body'],
+					and return['fresh'], False if it must be revalidated. None if not cached
+		"""
+		conn = self.connect()
+		row = conn.execute('''SELECT url, status, headers, body, stored FROM responses WHERE key = ?''', (key,)).fetchone()
+		if row is not None:
+			conn.execute('''UPDATE responses SET accessed = ? WHERE key = ?''', (time.time(), key))
+		conn.close()
+		if row is None:
+			return None
+		return {
+			'url': row[0],
+			'status': row[1],
+			'headers': json.loads(row[2]),
+			'body': row[3],
+			'fresh': time.time() - row[4] < self.ttl(row[0])
+		}
+
+	def store(self, key, url, status, headers, body):
+		"""
+		Caches a response, then removes the least recently used responses past the size cap
+		:param1 key: String, output of key()
+		:param2 url: String
+		:param3 status: Integer, HTTP status code
+		:param4 headers: Dictionary of response headers
+		:param5 body: Bytes
+		"""
+		now = time.time()
+		conn = self.connect()
+		conn.execute('''INSERT OR REPLACE INTO responses (key, url, status, headers, body, size, stored, accessed)
+			VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', (key, url, status, json.dumps(dict(headers)), body, len(body), now, now))
+		self.evict(conn)
+		conn.close()
+
+	def renew(self, key):
+		"""
+		Marks a cached response as fresh again, after the server has confirmed it has not changed
+		:param1 key: String, output of key()
+		"""
+		now = time.time()
+		conn = self.connect()
+		conn.execute('''UPDATE responses SET stored = ?, accessed = ? WHERE key = ?''', (now, now, key))
+		conn.close()
+
+	def evict(self, conn):
+		"""
+		Removes the least recently used responses until the total size is within max_size
+		:param1 conn: A connection to the cache database
+		"""
+		excess = conn.execute('''SELECT COALESCE(SUM(size), 0) FROM responses''').fetchone()[0] - self.max_size
+		if (excess <= 0):
+			return
+		keys = []
+		for row in conn.execute('''SELECT key, size FROM responses ORDER BY accessed'''):
+			keys.append((row[0],))
+			excess -= row[1]
+			if (excess <= 0):
+				break
+		conn.executemany('''DELETE FROM responses WHERE key = ?''', keys)
+
+	def clear(self):
+		"""
+		Removes every cached response
+		"""
+		conn = self.connect()
+		conn.execute('''DELETE FROM responses''')
+		conn.close()
+
+class CachingAdapter(BaseAdapter):
+	"""
+	A requests transport adapter answering GET and POST requests from a ResponseCache, and passing
+	any other request to the adapter it wraps. Streamed requests, such as file downloads, are not cached
+	"""
+
+	def __init__(self, adapter, response_cache):
+		super().__init__()
+		self.adapter = adapter
+		self.cache = response_cache
+
+	def send(self, request, stream=False, **kwargs):
+		if (request.method not in ("GET", "POST")) or stream:
+			if self.cache.offline:
+				raise OfflineError("Not available offline: " + request.url, request=request)
+			return self.adapter.send(request, stream=stream, **kwargs)
+
+		key = self.cache.key(request.method, request.url, request.body)
+		entry = self.cache.lookup(key)
+		if (entry is not None) and (entry['fresh'] or self.cache.offline):
+			return self.build_response(request, entry)
+		if self.cache.offline:
+			raise OfflineError("Not cached: " + request.method + " " + request.url, request=request)
+
+		# A stale response is revalidated, the server answers 304 if it is unchanged
+		if entry is not None:
+			request = request.copy()
+			headers = CaseInsensitiveDict(entry['headers'])
+			if 'ETag' in headers:
+				request.headers['If-None-Match'] = headers['ETag']
+			if 'Last-Modified' in headers:
+				request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+		response = self.adapter.send(request, stream=stream, **kwargs)
+		if (response.status_code == 304) and (entry is not None):
+			response.close()
+			self.cache.renew(key)
+			return self.build_response(request, entry)
+		if (response.status_code == 200) and ("no-store" not in response.headers.get('Cache-Control', "")):
+			self.cache.store(key, request.url, response.status_code, response.headers, response.content)
+		return response
+
+	def build_response(self, request, entry):
+		"""
+		:param1 request: A requests.PreparedRequest
+		:param2 entry: Dictionary, output of ResponseCache.lookup()
+		:returns: A requests.Response holding the cached response
+		"""
+		response = requests.Response()
+		response.status_code = entry['status']
+		response.reason = "OK"
+		response.headers = CaseInsensitiveDict(entry['headers'])
+		response.encoding = get_encoding_from_headers(response.headers)
+		response.url = entry['url']
+		response.request = request
+		response.connection = self
+		response.raw = io.BytesIO(entry['body'])
+		response._content = entry['body']
+		response._content_consumed = True
+		response.from_cache = True
+		return response
+
+	def close(self):
+		self.adapter.close()
+
+def get_cache():
+	"""
+	:returns: The shared ResponseCache, created on first use
+	"""
+	global cache
+	with cache_lock:
+		if cache is None:
+			cache = ResponseCache()
+		return cache
+
+def install(session, response_cache=None):
+	"""
+	Answers a requests session's requests from a cache, by wrapping each of its transport adapters
+	:param1 session: A requests.Session
+	:param2 response_cache: A ResponseCache, the shared cache if None
+	"""
+	response_cache = response_cache or get_cache()
+	for prefix, adapter in list(session.adapters.items()):
+		session.mount(prefix, CachingAdapter(adapter, response_cache))
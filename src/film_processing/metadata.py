@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Information about films from IMDb, kept in a local database keyed by IMDb id.
+A film is fetched from IMDb once, later lookups of the same film are answered from the database.
+Only the info sets holding the shown information are fetched, with one IMDb access object shared by every thread.
+"""
+
+#imports
+import sys
+import os
+import time
+import sqlite3
+import threading
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+import imdb 							# Used for gathering information about films, year, title, director, and runtime
+import http_cache						# Used for its offline mode, in which IMDb is not used
+
+# Path to the metadata database file
+METADATA_PATH = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/metadata.db"
+
+# Version of the metadata schema, stored in the database as PRAGMA user_version
+# 1: films. 2: searches
+METADATA_VERSION = 2
+
+# IMDb info sets fetched for a film. Title, year, director, cast, and runtime are all in 'main'
+INFO_SETS = ('main',)
+
+# Number of cast members kept for a film
+CAST_SIZE = 3
+
+# Created on first use by get_access()
+access = None
+access_lock = threading.Lock()
+
+# Held while the access object makes requests, it is not safe to use from several threads at once
+fetch_lock = threading.Lock()
+
+def create_schema(c):
+	"""
+	Creates the tables of a metadata database
+	films: the information shown for a film, by IMDb id, and the time it was fetched
+	searches: the IMDb id of the first IMDb result for each searched title, see search()
+	:param1 c: A cursor on an empty database file
+	"""
+	c.execute('''CREATE TABLE films
+		(imdbid TEXT PRIMARY KEY, title TEXT NOT NULL, year TEXT NOT NULL, director TEXT NOT NULL,
+		top_cast TEXT NOT NULL, runtime TEXT NOT NULL, fetched REAL NOT NULL)''')
+	create_searches_table(c)
+	c.execute('''PRAGMA user_version = %d''' % METADATA_VERSION)
+
+def create_searches_table(c):
+	"""
+	Creates the table of searched titles, imdbid is NULL for a title IMDb has no result for
+	:param1 c: A cursor on a metadata database
+	"""
+	c.execute('''CREATE TABLE searches
+		(query TEXT PRIMARY KEY, imdbid TEXT, fetched REAL NOT NULL)''')
+
+def connect(metadata_path=None):
+	"""
+	Opens a metadata database, creating it if it does not exist. Each thread uses its own connection
+	:param1 metadata_path: String, path to the metadata database file, METADATA_PATH if None
+	:returns: A sqlite3 connection in autocommit mode
+	"""
+	if metadata_path is None:
+		metadata_path = METADATA_PATH
+	if not (os.path.isdir(os.path.dirname(metadata_path))):
+		os.makedirs(os.path.dirname(metadata_path))
+	conn = sqlite3.connect(metadata_path, timeout=30, isolation_level=None)
+	c = conn.cursor()
+	if (c.execute('''PRAGMA user_version''').fetchone()[0] < METADATA_VERSION):
+		c.execute('''BEGIN IMMEDIATE''')
+		# Another thread may have created the schema while this one waited
+		version = c.execute('''PRAGMA user_version''').fetchone()[0]
+		if (version == 0):
+			create_schema(c)
+		elif (version < METADATA_VERSION):
+			if (version < 2):
+				create_searches_table(c)
+			c.execute('''PRAGMA user_version = %d''' % METADATA_VERSION)
+		c.execute('''COMMIT''')
+	return conn
+
+def get_access():
+	"""
+	:returns: The shared IMDb access object, created on first use
+	"""
+	global access
+	with access_lock:
+		if access is None:
+			access = imdb.IMDb()
+		return access
+
+def lookup(imdbid, metadata_path=None):
+	"""
+	:param1 imdbid: String, IMDb id in form '#######'
+	:param2 metadata_path: String, path to the metadata database file, METADATA_PATH if None
+	:returns: Dictionary in the format of get_movie_info(), None if the film has not been fetched
+	"""
+	conn = connect(metadata_path)
+	row = conn.execute('''SELECT title, year, director, top_cast, runtime FROM films WHERE imdbid = ?''', (imdbid,)).fetchone()
+	conn.close()
+	if row is None:
+		return None
+	return dict(zip(('title', 'year', 'director', 'cast', 'runtime'), row))
+
+def store(imdbid, info, metadata_path=None):
+	"""
+	:param1 imdbid: String, IMDb id in form '#######'
+	:param2 info: Dictionary in the format of get_movie_info()
+	:param3 metadata_path: String, path to the metadata database file, METADATA_PATH if None
+	"""
+	conn = connect(metadata_path)
+	conn.execute('''INSERT OR REPLACE INTO films (imdbid, title, year, director, top_cast, runtime, fetched)
+		VALUES (?, ?, ?, ?, ?, ?, ?)''',
+		(imdbid, info['title'], info['year'], info['director'], info['cast'], info['runtime'], time.time()))
+	conn.close()
+
+def fetch(imdbid):
+	"""
+	Fetches a film from IMDb, reading only INFO_SETS. fetch_lock must be held
+	:param1 imdbid: String, IMDb id in form '#######'
+	:returns: Dictionary in the format of get_movie_info()
+	"""
+	movie = get_access().get_movie(imdbid, info=INFO_SETS)
+	return {
+		'title': movie['title'],
+		'year': str(movie.get('year', "")),
+		'director': str(movie['director'][0]['name']) if movie.get('director') else "",
+		'cast': ", ".join(str(person['name']) for person in movie.get('cast', [])[:CAST_SIZE]),
+		'runtime': str(movie.get('runtimes', ""))
+	}
+
+def get_info(imdbid, refresh=False, metadata_path=None):
+	"""
+	Finds the information of a film, fetching it from IMDb only if it is not in the database
+	:param1 imdbid: String, IMDb id in form '#######'
+	:param2 refresh: Boolean, if True the film is fetched again even if it is in the database
+	:param3 metadata_path: String, path to the metadata database file, METADATA_PATH if None
+	:returns: Dictionary in the format of get_movie_info()
+	"""
+	if not refresh:
+		info = lookup(imdbid, metadata_path)
+		if info is not None:
+			return info
+	if http_cache.get_cache().offline:
+		raise http_cache.OfflineError("Not fetched: IMDb film " + imdbid)
+	with fetch_lock:
+		# Another thread may have fetched the film while this one waited
+		info = None if refresh else lookup(imdbid, metadata_path)
+		if info is None:
+			info = fetch(imdbid)
+			store(imdbid, info, metadata_path)
+	return info
+
+def search(title, refresh=False, metadata_path=None):
+	"""
+	Searches IMDb for a title. The result is kept, so searching the same title again does not use the network
+	:param1 title: String, the title searched for
+	:param2 refresh: Boolean, if True IMDb is searched again even if the title has been searched before
+	:param3 metadata_path: String, path to the metadata database file, METADATA_PATH if None
+	:returns: String, IMDb id of the first result in form '#######', None if IMDb has no result
+	"""
+	# Titles differing only in case or spacing are the same search
+	query = " ".join(title.lower().split())
+	if not refresh:
+		conn = connect(metadata_path)
+		row = conn.execute('''SELECT imdbid FROM searches WHERE query = ?''', (query,)).fetchone()
+		conn.close()
+		if row is not None:
+			return row[0]
+	if http_cache.get_cache().offline:
+		raise http_cache.OfflineError("Not searched: IMDb title " + title)
+	with fetch_lock:
+		movies = get_access().search_movie(title)
+	imdbid = movies[0].movieID if movies else None
+	conn = connect(metadata_path)
+	conn.execute('''INSERT OR REPLACE INTO searches (query, imdbid, fetched) VALUES (?, ?, ?)''', (query, imdbid, time.time()))
+	conn.close()
+	return imdbid
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Runs network requests off the calling thread. Tasks are submitted to a shared pool of threads and
+return a concurrent.futures.Future, so a user interface can wait for the result without blocking.
+A running task is cancelled through its CancelToken, which it checks between requests.
+"""
+
+#imports
+import time
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import BaseAdapter
+
+# Seconds to wait for a server to respond before a request fails
+DEFAULT_TIMEOUT = 15
+
+# Number of tasks run at once, further tasks wait for a thread to become free
+MAX_WORKERS = 4
+
+# Created on the first submitted task
+executor = None
+executor_lock = threading.Lock()
+
+class Cancelled(Exception):
+	"""
+	Raised within a task when its CancelToken is cancelled
+	"""
+	pass
+
+class CancelToken():
+	"""
+	Shared between a task and the code that started it. The task calls check() between requests,
+	which raises Cancelled once cancel() has been called
+	"""
+
+	def __init__(self):
+		self.event = threading.Event()
+
+	def cancel(self):
+		self.event.set()
+
+	@property
+	def cancelled(self):
+		return self.event.is_set()
+
+	def check(self):
+		if self.event.is_set():
+			raise Cancelled()
+
+	def sleep(self, seconds):
+		"""
+		Waits for a number of seconds, raising Cancelled as soon as cancel() is called
+		"""
+		if self.event.wait(seconds):
+			raise Cancelled()
+
+def get_executor():
+	"""
+	:returns: The shared ThreadPoolExecutor, created on first use
+	"""
+	global executor
+	with executor_lock:
+		if executor is None:
+			executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="network")
+		return executor
+
+def submit(fn, *args, **kwargs):
+	"""
+	Runs a function on the network threads
+	:param1 fn: Function to run, it should accept the cancel and progress keyword arguments if given
+	:returns: A concurrent.futures.Future of its result
+	"""
+	return get_executor().submit(fn, *args, **kwargs)
+
+def report(progress, message):
+	"""
+	Passes a progress message to a callback, if there is one
+	:param1 progress: Function accepting a string, or None
+	:param2 message: String describing the current step
+	"""
+	if progress is not None:
+		progress(message)
+
+def check(cancel):
+	"""
+	Raises Cancelled if a task has been cancelled
+	:param1 cancel: A CancelToken, or None if the task can not be cancelled
+	"""
+	if cancel is not None:
+		cancel.check()
+
+class RateLimiter():
+	"""
+	Spaces out requests to each host, so many threads downloading at once do not flood a server.
+	Threads waiting on the same host are let through one interval apart, in the order they arrived
+	"""
+
+	def __init__(self, rate):
+		"""
+		:param1 rate: Number of requests per second allowed to each host
+		"""
+		self.interval = 1.0 / rate
+		self.next = {}
+		self.lock = threading.Lock()
+
+	def wait(self, host):
+		"""
+		Blocks until a request may be sent to host
+		:param1 host: String, the host name
+		"""
+		with self.lock:
+			now = time.monotonic()
+			start = max(now, self.next.get(host, now))
+			self.next[host] = start + self.interval
+		if (start > now):
+			time.sleep(start - now)
+
+	def install(self, session):
+		"""
+		Limits the requests of a requests session, by wrapping each of its transport adapters.
+		Adapters installed later, such as http_cache's, wrap this one so their answers are not limited
+		:param1 session: A requests.Session
+		"""
+		for prefix, adapter in list(session.adapters.items()):
+			session.mount(prefix, RateLimitedAdapter(adapter, self))
+
+class RateLimitedAdapter(BaseAdapter):
+	"""
+	A requests transport adapter waiting on a RateLimiter before passing each request to the adapter it wraps
+	"""
+
+	def __init__(self, adapter, limiter):
+		super().__init__()
+		self.adapter = adapter
+		self.limiter = limiter
+
+	def send(self, request, **kwargs):
+		self.limiter.wait(urlsplit(request.url).hostname or "")
+		return self.adapter.send(request, **kwargs)
+
+	def close(self):
+		self.adapter.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compares the time taken to parse subscene film pages with each backend: BeautifulSoup with each
+parser, and lxml.html directly. Saved film pages can be given, otherwise a page with a given number
+of subtitle rows is generated.
+
+usage: python3 -m film_processing.parse_benchmark [page.html ...] [--rows N] [--repeat N]
+"""
+
+#imports
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from subscene import subscene
+
+# Languages used for the rows of a generated page
+LANGUAGES = ["English", "French", "Spanish", "Arabic", "Indonesian", "Portuguese", "Farsi/Persian", "Vietnamese"]
+
+def generate_page(rows):
+	"""
+	Builds a film page in the layout of subscene.com
+	:param1 rows: Integer, number of subtitle rows
+	:returns: String, the page's html
+	"""
+	html = ['<html><head><title>The Film subtitles</title>']
+	# Scripts, menus, and comments outside of the subtitles table
+	html.append('<script>' + "var x = 1;" * 2000 + '</script></head><body>')
+	html.append('<div id="nav"><ul>' + '<li><a href="/browse">Browse</a></li>' * 200 + '</ul></div>')
+	html.append('<div class="subtitles"><div class="box clearfix"><div class="poster"><img src="/poster.jpg"/></div>')
+	html.append('<div class="header"><h2>The Film <a class="imdb" href="https://www.imdb.com/title/tt0133093">Imdb</a></h2>')
+	html.append('<ul><li><strong>Year:</strong> 1999</li></ul></div></div><table><thead><tr><td>Name</td></tr></thead><tbody>')
+	for i in range(rows):
+		language = LANGUAGES[i % len(LANGUAGES)]
+		html.append('<tr><td class="a1"><a href="/subtitles/the-film/' + language.lower().replace("/", "_") + '/' + str(i) + '">'
+			'<div class="visited"><span class="l r positive-icon">' + language + '</span>'
+			'<span>The.Film.1999.1080p.BluRay.x264-GROUP' + str(i) + '</span></div></a></td>'
+			'<td class="a3">1</td><td class="a40"></td><td class="a5"><a href="/u/' + str(i) + '">uploader' + str(i) + '</a></td>'
+			'<td class="a6"><div>Synced and corrected for this release ' + str(i) + '</div></td><td class="a7"></td></tr>')
+	html.append('</tbody></table></div>')
+	html.append('<div id="comments">' + '<p>Thanks for the subtitle</p>' * 500 + '</div></body></html>')
+	return "".join(html)
+
+def time_parse(html, backend, parser, repeat):
+	"""
+	:returns: Tuple (median seconds to parse the page, the parsed Film)
+	"""
+	times = []
+	for i in range(repeat):
+		start = time.perf_counter()
+		film = subscene.Film.from_html(html, backend, parser)
+		# Rows are read as they are used, so every row is read as part of the parse
+		list(film.subtitles)
+		times.append(time.perf_counter() - start)
+	return (sorted(times)[len(times) // 2], film)
+
+def film_fields(film):
+	"""
+	:returns: Tuple of everything read from a film page, to check each backend reads the same
+	"""
+	return (film.title, film.year, film.imdb, film.cover,
+		[(s.title, s.url, s.language, s.owner_username, s.owner_url, s.description) for s in film.subtitles])
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compare parsing subscene film pages with each parser")
+	parser.add_argument("pages", nargs="*", help="saved film pages, a page is generated if none are given")
+	parser.add_argument("--rows", type=int, default=3000, help="number of subtitle rows of a generated page")
+	parser.add_argument("--repeat", "-r", type=int, default=5, help="number of times each page is parsed")
+	args = parser.parse_args(argv)
+
+	pages = []
+	for path in args.pages:
+		with open(path, encoding="utf-8", errors="replace") as f:
+			pages.append((os.path.basename(path), f.read()))
+	if not pages:
+		pages.append(("generated, {:,} rows".format(args.rows), generate_page(args.rows)))
+
+	# (backend, parser), the first is how pages were parsed before
+	configs = [("bs4", "html.parser")]
+	try:
+		import lxml.html
+		configs += [("bs4", "lxml"), ("lxml", None)]
+	except ImportError:
+		print("lxml is not installed, only html.parser is measured")
+
+	for name, html in pages:
+		print("{} ({:,} KB)".format(name, len(html) // 1024))
+		print("{:<8}{:<14}{:>12}{:>12}{:>10}".format("backend", "parser", "ms", "subtitles", "speedup"))
+		baseline = None
+		for backend, parser_name in configs:
+			seconds, film = time_parse(html, backend, parser_name, args.repeat)
+			if baseline is None:
+				baseline = (seconds, film_fields(film))
+			elif (film_fields(film) != baseline[1]):
+				print("{} {} read the page differently".format(backend, parser_name))
+			print("{:<8}{:<14}{:>12.1f}{:>12,}{:>9.1f}x".format(backend, parser_name or "-",
+				1000 * seconds, len(film.subtitles), baseline[0] / seconds))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -3,12 +3,15 @@
 #imports
 import sys
 import os
-import math
+import numpy as np
 import matplotlib.pyplot as plt
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 sys.path.append(sys.path[0] + "/../")
 import film_processing.film_data
 import sub_processing.srt_parsing as srtp
+import sub_processing.corpus as corpus
+import sub_processing.token_file as token_file
+from sub_processing.tokenizer import tokenize
 
 class SubtitleData():
 
@@ -16,92 +19,122 @@ class SubtitleData():
 		self.subpath = " "
 		self.dbpath = " "
 		self.imgpath = " "
+		self.clear_cache()
 
-	def open_subtitle(self, subtitle_path):
+	def open_subtitle(self, subtitle_path, progress=None, cancel=None):
+		"""
+		Opens a subtitle file, writing its word_db file unless one is up to date with the file's contents
+		:param1 subtitle_path: String, path to a .srt file
+		:param2 progress: Function called with the number of subtitles read and words written, see srtp.gen_word_db()
+		:param3 cancel: Object whose check() method raises to stop opening the file, see srtp.gen_word_db()
+		"""
 		self.subpath = subtitle_path
 		dirname = subtitle_path.split("/")[-2]
-		word_list = srtp.load_srt(self.subpath)
-		self.dbpath = srtp.gen_word_db(word_list, dirname)
+		dbpath = srtp.DB_DIR + dirname + "/words.db"
+		source = srtp.describe_source(self.subpath)
+		# A film opened before from the same contents is reused, along with its cached words
+		if srtp.is_up_to_date(dbpath, source):
+			if (dbpath != self.dbpath):
+				self.clear_cache()
+			self.dbpath = dbpath
+		else:
+			# The mapped token file of a previous film is released before its files are replaced
+			self.clear_cache()
+			# Subtitles are tokenized and written as they are read from the file
+			self.dbpath = srtp.gen_word_db(srtp.iter_srt(self.subpath), dirname, source=source, progress=progress, cancel=cancel)
+		if cancel is not None:
+			cancel.check()
+		# The film's words are also added to the corpus of every opened film, unless they already are
+		corpus.upsert_film(dirname, self.dbpath)
+
+	def clear_cache(self):
+		"""
+		Empties the in memory copy of the opened subtitle, see load_index()
+		"""
+		self.db_mtime = None
+		self.vocab = None
+		self.vocab_ids = None
+		self.word_ids = None
+		self.times = None
+		self.orderings = None
+		self.posting_order = None
+		self.posting_bounds = None
+
+	def load_index(self):
+		"""
+		Loads the opened subtitle into memory once, reloading it only if the database file has changed.
+		Words are kept in order of time as parallel arrays, word_ids, times in seconds, and orderings,
+		mapped from the film's binary token file when it is up to date.
+		vocab[word_id] is the word with that id, and vocab_ids[word] is its id.
+		A positional inverted index is kept in posting_order and posting_bounds, see get_postings()
+		"""
+		db_mtime = os.path.getmtime(self.dbpath)
+		if (self.word_ids is not None) and (db_mtime == self.db_mtime):
+			return
+		columns = load_columns(self.dbpath)
+		self.db_mtime = db_mtime
+		self.vocab = columns['vocab']
+		self.vocab_ids = {word: word_id for word_id, word in enumerate(self.vocab) if word}
+		self.word_ids = columns['word_id']
+		self.times = columns['tstamp']
+		self.orderings = columns['ordering']
+		# Positions sorted by word id, and by position within each word
+		self.posting_order = np.argsort(self.word_ids, kind="stable")
+		self.posting_bounds = np.searchsorted(self.word_ids[self.posting_order], np.arange(len(self.vocab) + 1))
+
+	def get_postings(self, word_id):
+		"""
+		Finds every position of a word in the opened subtitle, load_index() must be called first
+		:param1 word_id: Integer, id of a word in vocab
+		:returns: A sorted array of every index in word_ids where the word appears
+		"""
+		return self.posting_order[self.posting_bounds[word_id]:self.posting_bounds[word_id + 1]]
+
+	def find_phrase(self, phrase):
+		"""
+		Finds every appearance of a multi-word phrase in the opened subtitle, including overlapping appearances.
+		Every appearance has the rarest word of the phrase at a known offset, so its posting list gives the
+		possible starts, which are checked against each other word of the phrase
+		:param1 phrase: String, a multi-word phrase to be searched for
+		:returns: A sorted array of indexes in word_ids where the phrase starts
+		"""
+		self.load_index()
+		phrase_ids = [self.vocab_ids.get(word) for word in tokenize(phrase)]
+		if (not phrase_ids) or (None in phrase_ids):
+			return np.zeros(0, dtype=np.int64)
+
+		postings = [self.get_postings(word_id) for word_id in phrase_ids]
+		rarest = min(range(len(postings)), key=lambda j: len(postings[j]))
+		starts = postings[rarest] - rarest
+		# Disregard starts where the phrase would run past either end of the subtitle
+		starts = starts[(starts >= 0) & (starts + len(phrase_ids) <= len(self.word_ids))]
+		for j, word_id in enumerate(phrase_ids):
+			starts = starts[self.word_ids[starts + j] == word_id]
+		return starts
 
 	def get_phrase_count(self, phrase):
 		"""
-		Determines frequency of a multi-word phrase in a word_list file. Returns result as integer
-		:param1 phrase: String, a multi-word phrase to be searched for in word_list
-		:param2 word_list_path: String, path to file containing word_list. Output of get_word_list
-		:returns: Integer, representing frequency of phrase's appearance in word_list file 
+		Determines frequency of a multi-word phrase in the opened subtitle. Returns result as integer
+		:param1 phrase: String, a multi-word phrase to be searched for
+		:returns: Integer, representing frequency of phrase's appearance in the subtitle
 		"""
-		phrase = phrase.lower()			# Converts phrase into lower case form
-		phrase_list = phrase.split()	# Converts phrase into list of words
-		word_list = srtp.load_word_list(self.dbpath)	# Loads entire subtitle into word_list
-		frequency = 0	# Represents the frequency of the phrase
-		judge_word = 0	# Represents the word in the phrase to be looking for
-	
-		# For every every word in the list, check for the correct sequence of words in front
-		for word in word_list:
-			# If the word is equal to the desired phrase word 
-			if (word[0] == phrase_list[judge_word]):
-				# Begin to look for the next word in phrase
-				judge_word = judge_word + 1
-				# If the word to look for exceeds the length of the phrase, the phrase is found
-				if (judge_word == len(phrase_list)):
-					# Incriment frequency and revert word to look for to first word in phrase
-					frequency = frequency + 1
-					judge_word = 0
-			# Otherwise, the phrase is not here. Revert to looking for first word in phrase.
-			else:
-				judge_word = 0
-		return frequency
+		return len(self.find_phrase(phrase))
 	
 	def get_phrase_freq(self, phrase):
-		lowerphrase = phrase.lower()
-		word_counts = srtp.load_word_count(self.dbpath)
-		rank = 0
-
-		for row in word_counts:
-			rank += 1
-			if (row[0] == lowerphrase):
-				return get_nth_string(rank)
-
-		return "0th"
+		rank = srtp.load_word_rank(self.dbpath, phrase.lower())
+		return get_nth_string(rank)
 
 	def get_phrase_count_data(self, phrase, grouping=5):
 		"""
-		Determines frequency of phrase in a word list file over time. Returns a dictionary with
-		with multiples of grouping as minutes, and count of phrase as of that grouping
-		:param1 phrase: String, a multi-word phrase to be searched for in word_list
-		:param2 word_list_path: String, path to file containing word_list. Output of get_word_list
-		:param3 grouping: integer, minute window to measure occurence of phrase
-		:returns: Dictionary with return['time'] = [0, 1*gropuing, 2*grouping...] |
-					return['count'] = [0, count_(0 - group), count_(1*group - 2*group), ...]
-		"""
-		count = [0]	# Create count list
-		time = [0]	# Create time list
-		phrase = phrase.lower()			# Converts phrase into lower case form
-		phrase_list = phrase.split()	# Converts phrase into list of words
-		word_list = srtp.load_word_list(self.dbpath)	# Loads entire subtitle into word_list
-		frequency = 0	# Represents the frequency of the phrase
-		judge_word = 0	# Represents the word in the phrase to be looking for
-	
-		# For every every word in the list, check for the correct sequence of words in front
-		for word in word_list:
-			# If the word is equal to the desired phrase word 
-			if (word[0] == phrase_list[judge_word]):
-				# Begin to look for the next word in phrase
-				judge_word = judge_word + 1
-				# If the word to look for exceeds the length of the phrase, the phrase is found
-				if (judge_word == len(phrase_list)):
-					# Incriment frequency and revert word to look for to first word in phrase
-					judge_word = 0
-					if (math.floor(word[1]/60)//grouping != time[-1]):
-						#time.append(math.ceil((word[1]/60)/grouping))
-						time.append((math.ceil(word[1]/60)//grouping)*grouping)
-						count.append(count[-1] + 1)
-					else:
-						count[-1] = count[-1] + 1
-			# Otherwise, the phrase is not here. Revert to looking for first word in phrase.
-			else:
-				judge_word = 0
-		return {'time' : time, 'count' : count}
+		Determines frequency of phrase in the opened subtitle over time, see bin_times()
+		:param1 phrase: String, a multi-word phrase to be searched for
+		:param2 grouping: number, minute window to measure occurence of phrase
+		:returns: Dictionary of arrays with return['time'] = [0, 1*grouping, 2*grouping...] |
+					return['count'] = [0, count_(0 - group), count_(0 - 2*group), ...]
+		"""
+		# For every appearance of the phrase, the time of its last word is counted
+		last_words = self.find_phrase(phrase) + max(len(tokenize(phrase)) - 1, 0)
+		return bin_times(self.times[last_words], grouping)
 	
 	def get_phrase_count_plot(self, phrase, count_data, dirname="custom"):
 		"""
@@ -127,17 +160,14 @@ class SubtitleData():
 		self.imgpath = (path + "/plot.png")
 
 	def get_word_count_data(self, grouping=5):
-		count = [0]	# Create count list
-		time = [0]	# Create time list
-		word_list = srtp.load_word_list(self.dbpath)	# Loads entire subtitle into word_list
-		# For every every word in the list, add one to count and time to time list
-		for word in word_list:
-			if (math.floor(word[1]/60)//grouping != time[-1]):
-				time.append((math.ceil(word[1]/60)//grouping)*grouping)
-				count.append(count[-1] + 1)
-			else:
-				count[-1] = count[-1] + 1
-		return {'time' : time, 'count' : count}
+		"""
+		Determines the number of words in the opened subtitle over time, see bin_times()
+		:param1 grouping: number, minute window to measure words
+		:returns: Dictionary of arrays with return['time'] = [0, 1*grouping, 2*grouping...] |
+					return['count'] = [words as of each time]
+		"""
+		self.load_index()
+		return bin_times(self.times, grouping)
 
 	def get_word_count_plot(self, count_data, dirname="custom"):
 		path = sys.path[0] + "/../../sub_files/png/" + dirname
@@ -156,26 +186,14 @@ class SubtitleData():
 		self.imgpath = (path + "/plot.png")
 
 	def get_word_variety_data(self, grouping=5):
-		count = [0]	# Create count list
-		time = [0]	# Create time list
-		word_list = srtp.load_word_list(self.dbpath)	# Loads entire subtitle into word_list
-		unique_words = []
-		# For every every word in the list check for the unique word
-		for word in word_list:
-			is_unique = True
-			for unique in unique_words:
-				if (unique == word[0]):
-					is_unique = False
-					break
-			if (is_unique == True):
-				# Adds entry to list
-				if (math.floor(word[1]/60)//grouping != time[-1]):
-					time.append((math.ceil(word[1]/60)//grouping)*grouping)
-					count.append(count[-1] + 1)
-				else:
-					count[-1] = count[-1] + 1
-				unique_words.append(word[0])
-		return {'time' : time, 'count' : count}
+		"""
+		Determines the number of unique words in the opened subtitle over time
+		:param1 grouping: number, minute window to measure unique words
+		:returns: Dictionary of arrays with return['time'] = [0, 1*grouping, 2*grouping...] |
+					return['count'] = [unique words as of each time]
+		"""
+		self.load_index()
+		return bin_times(variety_times(self.word_ids, self.times), grouping)
 
 	def get_word_variety_plot(self, count_data, dirname="custom"):
 		path = sys.path[0] + "/../../sub_files/png/" + dirname
@@ -193,6 +211,61 @@ class SubtitleData():
 		plt.close()
 		self.imgpath = (path + "/plot.png")
 
+def load_columns(dbpath):
+	"""
+	Loads the words of a word_db file as columns, mapping the binary token file without parsing when it is up to date.
+	The database is read if the token file is missing or older
+	:param1 dbpath: String, path to a word_db file. Output of gen_word_db()
+	:returns: Dictionary of arrays in the format of srtp.load_word_columns()
+	"""
+	binpath = token_file.token_file_path(dbpath)
+	columns = None
+	if (os.path.isfile(binpath)) and (os.path.getmtime(binpath) >= os.path.getmtime(dbpath)):
+		columns = token_file.load_token_file(binpath)
+	if columns is None:
+		columns = srtp.load_word_columns(dbpath)
+	return columns
+
+def variety_times(word_ids, times):
+	"""
+	Finds when each unique word first appears
+	:param1 word_ids: An array of word ids, in order of time
+	:param2 times: An array of the time of each word in seconds
+	:returns: An array of times in seconds, one for each unique word
+	"""
+	first_words = np.unique(word_ids, return_index=True)[1]
+	return times[first_words]
+
+def bin_times(times, grouping=5):
+	"""
+	Groups event times into windows of grouping minutes, and counts the events as of the end of each window
+	:param1 times: An array of event times in seconds, in any order
+	:param2 grouping: number, minute window to count events in
+	:returns: Dictionary of arrays with return['time'] = [0, 1*grouping, 2*grouping...] in minutes |
+				return['count'] = [events at or before each time]
+	"""
+	times = np.asarray(times, dtype=np.float64)
+	if (times.size == 0):
+		return {'time' : np.zeros(1), 'count' : np.zeros(1, dtype=np.int64)}
+	# An event is counted in the first window ending at or after it
+	bins = np.ceil(times / (60 * grouping)).astype(np.int64)
+	count = np.cumsum(np.bincount(bins))
+	time = np.arange(count.size) * grouping
+	return {'time' : time, 'count' : count}
+
+def get_word_variety_batch(dbpaths, grouping=5):
+	"""
+	Determines the word variety curve of several subtitles at once, as in SubtitleData.get_word_variety_data()
+	:param1 dbpaths: A list of paths to word_db files. Output of gen_word_db()
+	:param2 grouping: number, minute window to measure unique words
+	:returns: A list of dictionaries of arrays, the word variety data of each file in the order of dbpaths
+	"""
+	variety_data = []
+	for dbpath in dbpaths:
+		columns = load_columns(dbpath)
+		variety_data.append(bin_times(variety_times(columns['word_id'], columns['tstamp']), grouping))
+	return variety_data
+
 def get_nth_string(number):
 	"""
 	Finds the nth string of a number. ex) 3: 3rd 256: 256th
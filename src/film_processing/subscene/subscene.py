@@ -25,13 +25,15 @@ this script that does the job by parsing the website"s pages.
 """
 
 # imports
+import os
 import re
 import enum
+import threading
 from contextlib import suppress
-from urllib.request import Request, urlopen
-from urllib.parse import urlencode
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import cfscrape
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # constants
 HEADERS = {
@@ -39,19 +41,101 @@ HEADERS = {
                   "Kit/537.36 (KHTML, like Gecko) Chrome/35.0.1916.47 Safa"
                   "ri/537.36"
 }
-SITE_DOMAIN = "https://subscene.com"
+# SUBSCENE_DOMAIN points requests at another server, such as a local copy of recorded pages
+SITE_DOMAIN = os.environ.get("SUBSCENE_DOMAIN", "https://subscene.com")
+# seconds to wait for a response before a request fails
+DEFAULT_TIMEOUT = 15
+# connections kept open to each host, one per thread making requests at once
+POOL_SIZE = 4
+# times a failed connection or a 429/5xx response is retried, waiting
+# RETRY_BACKOFF * 2 ** (retry - 1) seconds before each retry
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+_session = None
+_session_lock = threading.Lock()
+# functions called with each new session, before it is first used
+session_hooks = []
+# parser used by BeautifulSoup, and the backend film pages are parsed with.
+# the "lxml" backend reads film pages with lxml.html directly, without
+# building a BeautifulSoup tree, which is many times faster than "bs4"
+try:
+    import lxml.html
+    PARSER = "lxml"
+    BACKEND = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+    BACKEND = "bs4"
 
 
 # utils
-def soup_for(url):
+def configure_session(pool_size=None, retries=None, backoff=None):
+    """
+    Replaces the shared session, with a different pool size or retry policy.
+    Arguments left as None keep their current setting.
+    """
+    global POOL_SIZE, RETRIES, RETRY_BACKOFF, _session
+    with _session_lock:
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if retries is not None:
+            RETRIES = retries
+        if backoff is not None:
+            RETRY_BACKOFF = backoff
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_session():
+    """
+    Returns the scraper shared by every request. Its connections are kept
+    alive and reused, and the cookies of a passed Cloudflare challenge are
+    kept, so the challenge and TLS handshake happen once rather than on
+    every page.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = cfscrape.create_scraper()
+            retry = Retry(total=RETRIES, backoff_factor=RETRY_BACKOFF,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=None, raise_on_status=False)
+            # the https adapter keeps the ciphers cfscrape uses for
+            # Cloudflare
+            _session.mount("https://", cfscrape.CloudflareAdapter(
+                pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                max_retries=retry))
+            _session.mount("http://", HTTPAdapter(
+                pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                max_retries=retry))
+            for hook in session_hooks:
+                hook(_session)
+        return _session
+
+
+def html_for(url, timeout=DEFAULT_TIMEOUT):
     url = re.sub("\s", "+", url)
     #r = Request(url, data=None, headers=HEADERS)
     #html = urlopen(r).read().decode("utf-8")
     # CODE ADDED TO BYPASS CLOUDFLARE
-    scraper = cfscrape.create_scraper()
-    r = scraper.get(url)
-    html = r.text
-    return BeautifulSoup(html, "html.parser")
+    r = get_session().get(url, timeout=timeout)
+    r.raise_for_status()
+    return r.text
+
+
+def soup_for(url, timeout=DEFAULT_TIMEOUT, parse_only=None):
+    return BeautifulSoup(html_for(url, timeout), PARSER,
+                         parse_only=parse_only)
+
+
+def url_language(url):
+    """
+    Returns the language of a subtitle url, in the form
+    /subtitles/[film]/[language]/[id], in lower case.
+    """
+    parts = url.split("/subtitles/", 1)[-1].split("/")
+    return parts[1].lower() if len(parts) > 2 else ""
 
 
 class AttrDict():
@@ -83,6 +167,10 @@ SectionsParts = {
 
 
 class Subtitle:
+    # a popular film lists thousands of subtitles, kept without a __dict__
+    __slots__ = ("title", "url", "language", "owner_username", "owner_url",
+                 "description", "_zipped_url")
+
     def __init__(self, title, url, language, owner_username, owner_url,
                  description):
         self.title = title
@@ -102,50 +190,141 @@ class Subtitle:
         subtitles = []
 
         for row in rows:
-            if row.td.a is not None:
-                subtitles.append(cls.from_row(row))
+            link = row.td.a if row.td is not None else None
+            if link is not None:
+                subtitles.append((link.get("href") or "", row))
 
-        return subtitles
+        return Subtitles(subtitles, cls.from_row)
+
+    @classmethod
+    def from_lxml_rows(cls, rows):
+        subtitles = []
+
+        for row in rows:
+            cell = row.find(".//td")
+            link = cell.find(".//a") if cell is not None else None
+            if link is not None:
+                subtitles.append((link.get("href") or "", row))
+
+        return Subtitles(subtitles, cls.from_lxml_row)
 
     @classmethod
     def from_row(cls, row):
         attrs = AttrDict("title", "url", "language", "owner_username",
                          "owner_url", "description")
 
+        # each cell is found once, by its first class
+        cells = {}
+        for cell in row.find_all("td", recursive=False):
+            classes = cell.get("class")
+            if classes:
+                cells.setdefault(classes[0], cell)
+
         with suppress(Exception):
-            attrs.title = row.find("td", "a1").a.find_all("span")[1].text \
-                    .strip()
+            link = cells["a1"].a
+            spans = link.find_all("span")
+            attrs.url = SITE_DOMAIN + link.get("href")
+            attrs.language = spans[0].text.strip()
+            attrs.title = spans[1].text.strip()
 
         with suppress(Exception):
-            attrs.url = SITE_DOMAIN + row.find("td", "a1").a.get("href")
+            owner = cells["a5"].a
+            attrs.owner_username = owner.text.strip()
+            attrs.owner_url = SITE_DOMAIN + owner.get("href").strip()
 
         with suppress(Exception):
-            attrs.language = row.find("td", "a1").a.find_all("span")[0].text \
-                    .strip()
+            attrs.description = cells["a6"].div.text.strip()
+
+        return cls(**attrs.to_dict())
+
+    @classmethod
+    def from_lxml_row(cls, row):
+        """
+        Reads a row of an lxml.html tree, as from_row() reads a
+        BeautifulSoup row.
+        """
+        attrs = AttrDict("title", "url", "language", "owner_username",
+                         "owner_url", "description")
+
+        cells = {}
+        for cell in row.iterchildren("td"):
+            classes = cell.get("class", "").split()
+            if classes:
+                cells.setdefault(classes[0], cell)
 
         with suppress(Exception):
-            attrs.owner_username = row.find("td", "a5").a.text.strip()
+            link = cells["a1"].find(".//a")
+            spans = link.findall(".//span")
+            attrs.url = SITE_DOMAIN + link.get("href")
+            attrs.language = spans[0].text_content().strip()
+            attrs.title = spans[1].text_content().strip()
 
         with suppress(Exception):
-            attrs.owner_page = SITE_DOMAIN + row.find("td", "a5").a \
-                    .get("href").strip()
+            owner = cells["a5"].find(".//a")
+            attrs.owner_username = owner.text_content().strip()
+            attrs.owner_url = SITE_DOMAIN + owner.get("href").strip()
 
         with suppress(Exception):
-            attrs.description = row.find("td", "a6").div.text.strip()
+            attrs.description = cells["a6"].find(".//div").text_content() \
+                .strip()
 
         return cls(**attrs.to_dict())
 
     @property
     def zipped_url(self):
+        return self.get_zipped_url()
+
+    def get_zipped_url(self, timeout=DEFAULT_TIMEOUT):
         if self._zipped_url:
             return self._zipped_url
 
-        soup = soup_for(self.url)
+        soup = soup_for(self.url, timeout,
+                        SoupStrainer("div", class_="download"))
         self._zipped_url = SITE_DOMAIN + soup.find("div", "download").a \
             .get("href")
         return self._zipped_url
 
 
+class Subtitles:
+    """
+    The subtitles listed on a page. Each row is read into a Subtitle when it
+    is first used, so finding one subtitle does not read every row.
+    """
+    def __init__(self, rows, from_row):
+        """
+        rows is a list of (href, row) pairs, href being the url of the row's
+        link, and from_row reads a row into a Subtitle.
+        """
+        self._rows = rows
+        self._from_row = from_row
+        self._subtitles = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = range(len(self._rows))[index]
+        if index not in self._subtitles:
+            self._subtitles[index] = self._from_row(self._rows[index][1])
+        return self._subtitles[index]
+
+    def __iter__(self):
+        for index in range(len(self._rows)):
+            yield self[index]
+
+    def in_language(self, language):
+        """
+        Returns the subtitles in language, such as "english", as found in
+        their urls. Rows in other languages are never read.
+        """
+        language = language.lower()
+        return Subtitles([(href, row) for href, row in self._rows
+                          if url_language(href) == language], self._from_row)
+
+
 class Film:
     def __init__(self, title, year=None, imdb=None, cover=None,
                  subtitles=None):
@@ -159,8 +338,22 @@ class Film:
         return self.title
 
     @classmethod
-    def from_url(cls, url):
-        soup = soup_for(url)
+    def from_url(cls, url, timeout=DEFAULT_TIMEOUT):
+        return cls.from_html(html_for(url, timeout))
+
+    @classmethod
+    def from_html(cls, html, backend=None, parser=None, strainer=None):
+        """
+        Parses a film page with backend, "lxml" or "bs4", defaulting to
+        BACKEND. The "bs4" backend uses parser, defaulting to PARSER, and
+        only parses the elements matched by strainer if one is given. The
+        subtitle table is most of a film page, so straining to it is slower
+        than parsing the whole page.
+        """
+        if (backend or BACKEND) == "lxml":
+            return cls.from_lxml(html)
+
+        soup = BeautifulSoup(html, parser or PARSER, parse_only=strainer)
 
         content = soup.find("div", "subtitles")
         header = content.find("div", "box clearfix")
@@ -179,6 +372,58 @@ class Film:
 
         return cls(title, year, imdb, cover, subtitles)
 
+    @classmethod
+    def from_lxml(cls, html):
+        doc = lxml.html.document_fromstring(html)
+
+        content = doc.xpath('//div[contains(concat(" ", @class, " "),'
+                            ' " subtitles ")]')[0]
+        header = content.xpath('.//div[@class="box clearfix"]')[0]
+
+        cover = header.xpath('.//div[contains(concat(" ", @class, " "),'
+                             ' " poster ")]')[0].find(".//img").get("src")
+
+        details = header.xpath('.//div[contains(concat(" ", @class, " "),'
+                               ' " header ")]')[0]
+        h2 = details.find(".//h2")
+        title = h2.text_content()[:-12].strip()
+
+        imdb = h2.xpath('.//a[contains(concat(" ", @class, " "),'
+                        ' " imdb ")]')[0].get("href")
+
+        year = details.find(".//ul").find(".//li").text_content()
+        year = int(re.findall(r"[0-9]+", year)[0])
+
+        rows = content.find(".//table").find(".//tbody").iter("tr")
+        subtitles = Subtitle.from_lxml_rows(rows)
+
+        return cls(title, year, imdb, cover, subtitles)
+
+
+class Candidate:
+    """
+    A film listed on the search results page, see search_all().
+    """
+    def __init__(self, title, url, section=None, subtitle_count=None,
+                 film=None):
+        self.title = title
+        self.url = url
+        self.section = section
+        self.subtitle_count = subtitle_count
+
+        self._film = film
+
+    def __str__(self):
+        return self.title
+
+    def film(self, timeout=DEFAULT_TIMEOUT):
+        """
+        Returns the Film of this candidate, fetching its page on first use.
+        """
+        if self._film is None:
+            self._film = Film.from_url(self.url, timeout)
+        return self._film
+
 
 # functions
 def section_exists(soup, section):
@@ -196,7 +441,7 @@ def section_exists(soup, section):
     return False
 
 
-def get_first_film(soup, section):
+def get_first_film(soup, section, timeout=DEFAULT_TIMEOUT):
     tag_part = SectionsParts[section]
     tag = None
 
@@ -210,26 +455,75 @@ def get_first_film(soup, section):
         return
 
     url = SITE_DOMAIN + tag.findNext("ul").find("li").div.a.get("href")
-    return Film.from_url(url)
+    return Film.from_url(url, timeout)
 
 
-def search(term, language="", limit_to=SearchTypes.Exact):
+def search_soup(term, timeout=DEFAULT_TIMEOUT):
     # THIS LINE'S URL NO LONGER EXISTS
     #soup = soup_for("%s/subtitles/title?q=%s&l=%s" % (SITE_DOMAIN, term,
     #                                                  language))
 
     # Following Code added to counteract subscene site change
     #
-    url = 'https://subscene.com/subtitles/searchbytitle'
+    url = SITE_DOMAIN + '/subtitles/searchbytitle'
     d = dict({'query' : term})
-    data = urlencode(d).encode("utf-8")
-
-    req = Request(url, data=data, headers={'User-Agent': 'Mozilla/5.0'})
 
-    content = urlopen(req)
-    soup = BeautifulSoup(content, "lxml")
+    # sent on the shared session, so later pages reuse its connection
+    r = get_session().post(url, data=d, timeout=timeout)
+    r.raise_for_status()
+    return BeautifulSoup(r.content, "lxml")
     #======================================================
 
+
+def search_all(term, language="", timeout=DEFAULT_TIMEOUT):
+    """
+    Searches once and returns every film on the results page as a list of
+    Candidate, ranked by section (Exact, TV-Series, Popular, then Close) and
+    by position within the section. A film listed in several sections is
+    kept in its best one. If the search leads straight to a subtitle list,
+    the only candidate holds that list as its film.
+    """
+    soup = search_soup(term, timeout)
+
+    if "Subtitle search by" in str(soup):
+        rows = soup.find("table").tbody.find_all("tr")
+        subtitles = Subtitle.from_rows(rows)
+        return [Candidate(term, None, film=Film(term, subtitles=subtitles))]
+
+    results = soup.find("div", "search-result")
+    if results is None:
+        return []
+
+    # every section is read in a single walk over the results
+    found = {}
+    for header in results.find_all("h2"):
+        section = next((search_type for search_type, part
+                        in SectionsParts.items() if part in header.text),
+                       None)
+        listing = header.find_next_sibling("ul")
+        if section is None or listing is None:
+            continue
+        for position, item in enumerate(listing.find_all("li")):
+            with suppress(AttributeError, TypeError):
+                link = item.find("div", "title").a
+                url = SITE_DOMAIN + link.get("href")
+                count = item.find("div", "subtle count")
+                digits = re.findall(r"[0-9]+", count.text.replace(",", "")) \
+                    if count is not None else []
+                rank = (section.value, position)
+                if url not in found or rank < found[url][0]:
+                    found[url] = (rank, Candidate(
+                        link.text.strip(), url, section,
+                        int(digits[0]) if digits else None))
+
+    return [candidate for rank, candidate in sorted(found.values(),
+                                                    key=lambda f: f[0])]
+
+
+def search(term, language="", limit_to=SearchTypes.Exact,
+           timeout=DEFAULT_TIMEOUT):
+    soup = search_soup(term, timeout)
+
     if "Subtitle search by" in str(soup):
         rows = soup.find("table").tbody.find_all("tr")
         subtitles = Subtitle.from_rows(rows)
@@ -237,6 +531,6 @@ def search(term, language="", limit_to=SearchTypes.Exact):
 
     for junk, search_type in SearchTypes.__members__.items():
         if section_exists(soup, search_type):
-            return get_first_film(soup, search_type)
+            return get_first_film(soup, search_type, timeout)
         if limit_to == search_type:
             return
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compares opening films from their word_db files against their binary token files.
+Each storage is measured in its own process, so memory use of one does not count towards the other.
+
+usage: python3 -m sub_processing.benchmark [db dir] [--repeat N]
+"""
+
+#imports
+import sys
+import os
+import time
+import resource
+import argparse
+from multiprocessing import get_context
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+import srt_parsing as srtp
+import token_file
+
+def get_rss():
+	"""
+	:returns: Integer, resident memory of this process in bytes, the peak resident memory if the current is unknown
+	"""
+	try:
+		with open("/proc/self/statm") as f:
+			return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError):
+		# ru_maxrss is in kilobytes on Linux and bytes on macOS
+		scale = 1 if sys.platform == "darwin" else 1024
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def open_films(storage, dbpaths, repeat):
+	"""
+	Opens every film repeat times, keeping the last copy of each open
+	:param1 storage: String, "sqlite" or "binary"
+	:param2 dbpaths: A list of paths to word_db files
+	:param3 repeat: Integer, number of times each film is opened
+	:returns: Dictionary with return['seconds'], the median time to open all films, and return['rss'], bytes held by the open films
+	"""
+	rss = get_rss()
+	times = []
+	for i in range(repeat):
+		opened = []
+		start = time.perf_counter()
+		for dbpath in dbpaths:
+			if (storage == "binary"):
+				columns = token_file.load_token_file(token_file.token_file_path(dbpath))
+			else:
+				columns = srtp.load_word_columns(dbpath)
+			# Every word is read once, as a query would
+			columns['word_id'].max(initial=0)
+			columns['tstamp'].max(initial=0)
+			opened.append(columns)
+		times.append(time.perf_counter() - start)
+	return {'seconds': sorted(times)[len(times) // 2], 'rss': get_rss() - rss}
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compare opening films from sqlite and binary token files")
+	parser.add_argument("dir", nargs="?", default=srtp.DB_DIR, help="directory of word_db folders")
+	parser.add_argument("--repeat", "-r", type=int, default=5, help="number of times each film is opened")
+	args = parser.parse_args(argv)
+
+	dbpaths = []
+	for dirname in sorted(os.listdir(args.dir)):
+		dbpath = os.path.join(args.dir, dirname, "words.db")
+		if os.path.isfile(dbpath) and os.path.isfile(token_file.token_file_path(dbpath)):
+			dbpaths.append(dbpath)
+	if not dbpaths:
+		print("No films with both a word_db and a binary token file in " + args.dir)
+		return 1
+	tokens = sum(srtp.count_words(dbpath) for dbpath in dbpaths)
+
+	print("{:,} films, {:,} words".format(len(dbpaths), tokens))
+	print("{:<8}{:>14}{:>14}{:>14}{:>14}".format("storage", "open ms/film", "words/s", "RSS MB", "size MB"))
+	for storage in ("sqlite", "binary"):
+		# A fresh process for each storage, started without the parent's memory
+		with get_context("spawn").Pool(1) as pool:
+			result = pool.apply(open_films, (storage, dbpaths, args.repeat))
+		if (storage == "binary"):
+			size = sum(os.path.getsize(token_file.token_file_path(dbpath)) for dbpath in dbpaths)
+		else:
+			size = sum(os.path.getsize(dbpath) for dbpath in dbpaths)
+		print("{:<8}{:>14.3f}{:>14,.0f}{:>14.1f}{:>14.1f}".format(storage,
+			1000 * result['seconds'] / len(dbpaths), tokens / max(result['seconds'], 1e-9),
+			result['rss'] / 1e6, size / 1e6))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
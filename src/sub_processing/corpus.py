@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+A single database holding the words of every opened subtitle, so questions across films
+can be answered with one query instead of opening each film's word_db file.
+"""
+
+#imports
+import sys
+import os
+import sqlite3
+import numpy as np
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+import srt_parsing as srtp
+from tokenizer import tokenize
+
+# Path to the corpus database file
+CORPUS_PATH = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/corpus.db"
+
+# Version of the corpus schema, stored in the database as PRAGMA user_version
+# 1: films, vocab, tokens, film_words. 2: postings. 3: tokenizer column of films
+CORPUS_VERSION = 3
+
+def create_schema(c):
+	"""
+	Creates the tables and indexes of a corpus database
+	films: id, name, source file, and tokenizer version of every film, name is the folder of its word_db, usually an IMDb id
+	vocab: id of every distinct word in any film
+	tokens: every word of every film, in order of appearance with its time in seconds
+	film_words: the number of appearances of each word in each film
+	postings: the positions of each word in each film, see encode_positions()
+	:param1 c: A cursor on an empty database file
+	"""
+	c.execute('''CREATE TABLE films
+		(id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, path TEXT, size INTEGER, mtime REAL, hash TEXT,
+		word_count INTEGER NOT NULL, tokenizer INTEGER)''')
+
+	c.execute('''CREATE TABLE vocab
+		(id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE)''')
+
+	c.execute('''CREATE TABLE tokens
+		(film_id INTEGER NOT NULL, ordering INTEGER NOT NULL, word_id INTEGER NOT NULL, tstamp REAL NOT NULL,
+		PRIMARY KEY (film_id, ordering)) WITHOUT ROWID''')
+
+	c.execute('''CREATE TABLE film_words
+		(film_id INTEGER NOT NULL, word_id INTEGER NOT NULL, count INTEGER NOT NULL,
+		PRIMARY KEY (film_id, word_id)) WITHOUT ROWID''')
+
+	# Lists the films using a word most
+	c.execute('''CREATE INDEX film_words_word ON film_words (word_id, count DESC)''')
+
+	create_postings_table(c)
+	c.execute('''PRAGMA user_version = %d''' % CORPUS_VERSION)
+
+def create_postings_table(c):
+	"""
+	Creates the inverted index of a corpus database, one row per word per film
+	:param1 c: A cursor on a corpus database
+	"""
+	c.execute('''CREATE TABLE postings
+		(word_id INTEGER NOT NULL, film_id INTEGER NOT NULL, positions BLOB NOT NULL,
+		PRIMARY KEY (word_id, film_id)) WITHOUT ROWID''')
+
+def encode_varints(values):
+	"""
+	Encodes integers as LEB128 varints, 7 bits per byte with the high bit set on all but the last byte
+	:param1 values: A numpy array of non-negative integers below 2**35
+	:returns: Tuple (numpy uint8 array of the encoded bytes, numpy array of the number of bytes of each value)
+	"""
+	values = np.asarray(values, dtype=np.uint64)
+	lengths = np.ones(len(values), dtype=np.int64)
+	for bits in (7, 14, 21, 28):
+		lengths += values >= (1 << bits)
+	value_idx = np.repeat(np.arange(len(values)), lengths)
+	# Index of each byte within its value, 0 being the least significant 7 bits
+	byte_idx = np.arange(len(value_idx)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+	data = (values[value_idx] >> (byte_idx * 7).astype(np.uint64)) & 127
+	data[byte_idx < lengths[value_idx] - 1] |= 128
+	return (data.astype(np.uint8), lengths)
+
+def decode_varints(data):
+	"""
+	Decodes a byte string of LEB128 varints, the inverse of encode_varints()
+	:param1 data: Bytes or numpy uint8 array
+	:returns: A numpy int64 array of the decoded values
+	"""
+	data = np.frombuffer(data, dtype=np.uint8) if isinstance(data, bytes) else data
+	if len(data) == 0:
+		return np.zeros(0, dtype=np.int64)
+	last = data < 128
+	# Frequent words have gaps below 128, each a single byte
+	if last.all():
+		return data.astype(np.int64)
+	starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+	byte_idx = np.arange(len(data)) - np.repeat(starts, np.diff(np.append(starts, len(data))))
+	parts = (data & 127).astype(np.int64) << (byte_idx * 7)
+	return np.add.reduceat(parts, starts)
+
+def encode_positions(orderings):
+	"""
+	Encodes the sorted positions of a word in a film as the first position followed by the gap to each next position,
+	each stored as a varint. Most gaps fit in one or two bytes
+	:param1 orderings: A sorted numpy array of positions
+	:returns: Bytes
+	"""
+	return encode_varints(np.diff(orderings, prepend=0))[0].tobytes()
+
+def decode_positions(blobs):
+	"""
+	Decodes the positions of several posting lists at once, the inverse of encode_positions()
+	:param1 blobs: A list of bytes, each the output of encode_positions()
+	:returns: Tuple (numpy int64 array of all positions, numpy array of the number of positions of each blob)
+	"""
+	data = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+	gaps = decode_varints(data)
+	# Each blob holds as many values as it has final bytes
+	ends = np.cumsum(np.fromiter((len(blob) for blob in blobs), dtype=np.int64, count=len(blobs)))
+	counts = np.diff(np.cumsum(data < 128)[ends - 1], prepend=0) if len(data) else np.zeros(len(blobs), dtype=np.int64)
+	# The running sum restarts at the first value of each blob
+	total = np.cumsum(gaps)
+	firsts = np.cumsum(counts) - counts
+	return (total - np.repeat(total[firsts] - gaps[firsts], counts), counts)
+
+def build_postings(c, film_id):
+	"""
+	Writes the postings of a film from its rows in the tokens table
+	:param1 c: A cursor on a corpus database, within a transaction
+	:param2 film_id: Integer, id of the film
+	"""
+	rows = np.array(c.execute('''SELECT word_id, ordering FROM tokens WHERE film_id = ? ORDER BY ordering''',
+		(film_id,)).fetchall(), dtype=np.int64).reshape(-1, 2)
+	# A stable sort keeps each word's positions in order
+	order = np.argsort(rows[:, 0], kind="stable")
+	word_ids = rows[order, 0]
+	orderings = rows[order, 1]
+	firsts = np.flatnonzero(np.diff(word_ids, prepend=-1))
+	# Gaps are taken from the previous position of the same word, or from 0 for its first position
+	gaps = np.diff(orderings, prepend=0)
+	gaps[firsts] = orderings[firsts]
+	data, lengths = encode_varints(gaps)
+	offsets = np.append(np.cumsum(lengths)[firsts - 1] * (firsts > 0), len(data))
+	c.executemany('''INSERT INTO postings (word_id, film_id, positions) VALUES (?, ?, ?)''',
+		((int(word_ids[firsts[i]]), film_id, data[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(firsts))))
+
+def connect(corpus_path=None):
+	"""
+	Opens a corpus database, creating it if it does not exist. Transactions are started and ended explicitly
+	:param1 corpus_path: String, path to the corpus database file, CORPUS_PATH if None
+	:returns: A sqlite3 connection
+	"""
+	if corpus_path is None:
+		corpus_path = CORPUS_PATH
+	if not (os.path.isdir(os.path.dirname(corpus_path))):
+		os.makedirs(os.path.dirname(corpus_path))
+	conn = sqlite3.connect(corpus_path, isolation_level=None)
+	c = conn.cursor()
+	version = c.execute('''PRAGMA user_version''').fetchone()[0]
+	if (version == 0):
+		c.execute('''BEGIN''')
+		create_schema(c)
+		c.execute('''COMMIT''')
+	elif (version < CORPUS_VERSION):
+		c.execute('''BEGIN''')
+		if (version < 2):
+			# The postings replace the index of tokens by word
+			create_postings_table(c)
+			for (film_id,) in c.execute('''SELECT id FROM films''').fetchall():
+				build_postings(c, film_id)
+			c.execute('''DROP INDEX IF EXISTS tokens_word''')
+		if (version < 3):
+			c.execute('''ALTER TABLE films ADD COLUMN tokenizer INTEGER''')
+		c.execute('''PRAGMA user_version = %d''' % CORPUS_VERSION)
+		c.execute('''COMMIT''')
+	return conn
+
+def upsert_film(name, dbpath, corpus_path=None, force=False):
+	"""
+	Adds the words of a film's word_db file to the corpus, replacing any words previously added under the same name
+	:param1 name: String, name of the film, the folder of its word_db file
+	:param2 dbpath: String, path to file containing word_db. Output of gen_word_db()
+	:param3 corpus_path: String, path to the corpus database file
+	:param4 force: Boolean, if False a film already added from a source file with the same hash and tokenizer version is left unchanged
+	:returns: Integer, id of the film in the corpus
+	"""
+	source = srtp.load_source(dbpath) or {'path': None, 'size': None, 'mtime': None, 'hash': None, 'tokenizer': None}
+	conn = connect(corpus_path)
+	c = conn.cursor()
+
+	row = c.execute('''SELECT id, hash, tokenizer FROM films WHERE name = ?''', (name,)).fetchone()
+	if (row is not None) and (not force) and (source['hash'] is not None) and (row[1:] == (source['hash'], source['tokenizer'])):
+		conn.close()
+		return row[0]
+
+	# The film's database is read directly, so its words are copied without leaving sqlite
+	c.execute('''ATTACH DATABASE ? AS film''', (dbpath,))
+	c.execute('''BEGIN''')
+	if row is not None:
+		film_id = row[0]
+		c.execute('''DELETE FROM tokens WHERE film_id = ?''', (film_id,))
+		c.execute('''DELETE FROM film_words WHERE film_id = ?''', (film_id,))
+		c.execute('''DELETE FROM postings WHERE film_id = ?''', (film_id,))
+		c.execute('''UPDATE films SET path = ?, size = ?, mtime = ?, hash = ?, tokenizer = ?,
+			word_count = (SELECT COUNT(*) FROM film.tokens) WHERE id = ?''',
+			(source['path'], source['size'], source['mtime'], source['hash'], source['tokenizer'], film_id))
+	else:
+		c.execute('''INSERT INTO films (name, path, size, mtime, hash, tokenizer, word_count)
+			VALUES (?, ?, ?, ?, ?, ?, (SELECT COUNT(*) FROM film.tokens))''',
+			(name, source['path'], source['size'], source['mtime'], source['hash'], source['tokenizer']))
+		film_id = c.lastrowid
+
+	c.execute('''INSERT OR IGNORE INTO vocab (word) SELECT word FROM film.vocab''')
+	c.execute('''INSERT INTO tokens (film_id, ordering, word_id, tstamp)
+		SELECT ?, film_tokens.ordering, vocab.id, film_tokens.tstamp
+		FROM film.tokens AS film_tokens
+		JOIN film.vocab AS film_vocab ON film_vocab.id = film_tokens.word_id
+		JOIN vocab ON vocab.word = film_vocab.word''', (film_id,))
+	c.execute('''INSERT INTO film_words (film_id, word_id, count)
+		SELECT ?, vocab.id, film_vocab.count
+		FROM film.vocab AS film_vocab JOIN vocab ON vocab.word = film_vocab.word''', (film_id,))
+	build_postings(c, film_id)
+	c.execute('''COMMIT''')
+	c.execute('''DETACH DATABASE film''')
+
+	conn.close()
+	return film_id
+
+def remove_film(name, corpus_path=None):
+	"""
+	Removes a film and its words from the corpus. Words used by no other film are kept in vocab
+	:param1 name: String, name of the film
+	:param2 corpus_path: String, path to the corpus database file
+	"""
+	conn = connect(corpus_path)
+	c = conn.cursor()
+	c.execute('''BEGIN''')
+	row = c.execute('''SELECT id FROM films WHERE name = ?''', (name,)).fetchone()
+	if row is not None:
+		c.execute('''DELETE FROM tokens WHERE film_id = ?''', row)
+		c.execute('''DELETE FROM film_words WHERE film_id = ?''', row)
+		c.execute('''DELETE FROM postings WHERE film_id = ?''', row)
+		c.execute('''DELETE FROM films WHERE id = ?''', row)
+	c.execute('''COMMIT''')
+	conn.close()
+
+def films_by_word(word, top=50, corpus_path=None):
+	"""
+	Finds the films which use a word most
+	:param1 word: String, a lower case word
+	:param2 top: Integer, the maximum number of films to list
+	:param3 corpus_path: String, path to the corpus database file
+	:returns: A list of lists of a film name, the word's count in the film, and the film's total word count,
+	from most to least appearances of the word
+	"""
+	conn = connect(corpus_path)
+	c = conn.cursor()
+	films = []
+	for row in c.execute('''SELECT films.name, film_words.count, films.word_count
+		FROM film_words JOIN films ON films.id = film_words.film_id
+		WHERE film_words.word_id = (SELECT id FROM vocab WHERE word = ?)
+		ORDER BY film_words.count DESC LIMIT ?''', (word, top)):
+		films.append([row[0], row[1], row[2]])
+	conn.close()
+	return films
+
+def search_phrase(phrase, top=50, first=10, corpus_path=None):
+	"""
+	Finds the films which use a phrase most, from the postings alone. The positions of the rarest word
+	are checked against the positions of each other word, in every film at once
+	:param1 phrase: String, tokenized the same way as subtitles
+	:param2 top: Integer, the maximum number of films to list
+	:param3 first: Integer, the maximum number of times listed per film
+	:param4 corpus_path: String, path to the corpus database file
+	:returns: A list of lists of a film name, the phrase's count in the film, and a list of the times in seconds
+	of its first appearances, from most to least appearances of the phrase
+	"""
+	words = tokenize(phrase)
+	if not words:
+		return []
+	conn = connect(corpus_path)
+	c = conn.cursor()
+
+	# Total appearances of each distinct word of the phrase, a missing word means no film matches
+	totals = {}
+	for word in set(words):
+		row = c.execute('''SELECT vocab.id, SUM(film_words.count) FROM vocab
+			JOIN film_words ON film_words.word_id = vocab.id WHERE vocab.word = ?''', (word,)).fetchone()
+		if row[0] is None:
+			conn.close()
+			return []
+		totals[word] = row
+	rarest = min(words, key=lambda word: totals[word][1])
+	rarest_id = totals[rarest][0]
+
+	def keys(word_id):
+		# Only films containing the rarest word are read. Films are in order, so the keys are sorted
+		rows = c.execute('''SELECT film_id, positions FROM postings WHERE word_id = ?
+			AND film_id IN (SELECT film_id FROM postings WHERE word_id = ?) ORDER BY film_id''', (word_id, rarest_id)).fetchall()
+		positions, counts = decode_positions([row[1] for row in rows])
+		film_ids = np.repeat(np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)), counts)
+		return (film_ids << 32) + positions
+
+	# Positions are keyed by film_id * 2**32 + ordering, so every film is searched in one array.
+	# Every match starts at a position of the rarest word less its place in the phrase
+	rarest_keys = keys(rarest_id)
+	starts = rarest_keys - words.index(rarest)
+	# The remaining words are checked from rarest to most common, narrowing the starts quickly
+	for word in sorted(set(words), key=lambda word: totals[word][1]):
+		word_keys = rarest_keys if word == rarest else keys(totals[word][0])
+		# No film has both this word and the rarest word, or no start is left
+		if (word_keys.size == 0) or (starts.size == 0):
+			conn.close()
+			return []
+		for i in [i for i, other in enumerate(words) if other == word and i != words.index(rarest)]:
+			# Both arrays are sorted, so each start is looked up with a binary search
+			found = np.searchsorted(word_keys, starts + i)
+			starts = starts[word_keys[np.minimum(found, len(word_keys) - 1)] == starts + i]
+
+	# Matches are sorted, so each film's matches are contiguous
+	firsts = np.flatnonzero(np.diff(starts >> 32, prepend=-1))
+	film_ids = starts[firsts] >> 32
+	counts = np.diff(np.append(firsts, len(starts)))
+	films = []
+	for idx in np.lexsort((film_ids, -counts))[:top]:
+		film_id = int(film_ids[idx])
+		orderings = [int(o) for o in starts[firsts[idx]:firsts[idx] + min(first, counts[idx])] & 0xFFFFFFFF]
+		name = c.execute('''SELECT name FROM films WHERE id = ?''', (film_id,)).fetchone()[0]
+		times = [] if not orderings else [row[0] for row in c.execute('''SELECT tstamp FROM tokens WHERE film_id = ? AND ordering IN (%s)
+			ORDER BY ordering''' % ",".join("?" * len(orderings)), [film_id] + orderings)]
+		films.append([name, int(counts[idx]), times])
+	conn.close()
+	return films
+
+def list_films(corpus_path=None):
+	"""
+	Lists every film in the corpus
+	:param1 corpus_path: String, path to the corpus database file
+	:returns: A list of lists of a film name and its word count, sorted by name
+	"""
+	conn = connect(corpus_path)
+	c = conn.cursor()
+	films = []
+	for row in c.execute('''SELECT name, word_count FROM films ORDER BY name'''):
+		films.append([row[0], row[1]])
+	conn.close()
+	return films
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Generates word_db files for every .srt file in a directory, without the user interface.
+Files are processed in parallel, and files unchanged since they were last processed are skipped.
+
+usage: python3 -m sub_processing.ingest [dir] [--jobs N] [--force]
+"""
+
+#imports
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+import srt_parsing as srtp
+import corpus
+
+# Directory searched for .srt files by default
+SRT_DIR = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/srt"
+
+def find_srt_files(root):
+	"""
+	Finds every .srt file in a directory and its subdirectories. The word_db of a file is named after
+	the directory holding it, as in SubtitleData.open_subtitle(), so only the first file of each directory is kept
+	:param1 root: String, path to a directory
+	:returns: A sorted list of paths to .srt files
+	"""
+	found = {}
+	for dirpath, dirnames, filenames in os.walk(root):
+		dirnames.sort()
+		for filename in sorted(filenames):
+			if filename.lower().endswith(".srt"):
+				dirname = os.path.basename(dirpath)
+				if dirname in found:
+					print("Skipping " + os.path.join(dirpath, filename) + ", " + found[dirname] + " has the same db directory")
+				else:
+					found[dirname] = os.path.join(dirpath, filename)
+	return sorted(found.values())
+
+def ingest_file(path, force=False):
+	"""
+	Generates the word_db of a .srt file, unless the existing word_db is up to date, see srt_parsing.is_up_to_date()
+	:param1 path: String, path to a .srt file
+	:param2 force: Boolean, if True the word_db is always regenerated
+	:returns: Tuple (path, number of words written or None if skipped)
+	"""
+	dirname = os.path.basename(os.path.dirname(os.path.realpath(path)))
+	source = srtp.describe_source(path)
+	if (not force) and srtp.is_up_to_date(srtp.DB_DIR + dirname + "/words.db", source):
+		return (path, None)
+
+	dbpath = srtp.gen_word_db(srtp.iter_srt(path), dirname, fast_ingest=True, source=source)
+	return (path, srtp.count_words(dbpath))
+
+def ingest_dir(root, jobs=None, force=False, corpus_path=None):
+	"""
+	Generates the word_db of every .srt file in a directory using a pool of processes, printing any failures
+	:param1 root: String, path to a directory
+	:param2 jobs: Integer, number of processes. Defaults to the number of CPUs
+	:param3 force: Boolean, if True unchanged files are also regenerated
+	:param4 corpus_path: String, path to the corpus database each word_db is added to, see corpus.upsert_film()
+	:returns: Dictionary with return['files'], return['skipped'], return['failed'], return['words'], and return['seconds']
+	"""
+	paths = find_srt_files(root)
+	stats = {'files': 0, 'skipped': 0, 'failed': 0, 'words': 0, 'seconds': 0}
+	start = time.perf_counter()
+
+	with ProcessPoolExecutor(max_workers=jobs) as pool:
+		futures = [pool.submit(ingest_file, path, force) for path in paths]
+		for path, future in zip(paths, futures):
+			try:
+				path, words = future.result()
+				# The corpus is written by this process only, as sqlite allows a single writer
+				dirname = os.path.basename(os.path.dirname(os.path.realpath(path)))
+				corpus.upsert_film(dirname, srtp.DB_DIR + dirname + "/words.db", corpus_path)
+			except Exception as e:
+				print("Failed " + path + ": " + str(e))
+				stats['failed'] += 1
+				continue
+			if words is None:
+				stats['skipped'] += 1
+			else:
+				stats['files'] += 1
+				stats['words'] += words
+
+	stats['seconds'] = time.perf_counter() - start
+	return stats
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Generate word databases for a directory of .srt files")
+	parser.add_argument("dir", nargs="?", default=SRT_DIR, help="directory to search for .srt files")
+	parser.add_argument("--jobs", "-j", type=int, default=None, help="number of processes, defaults to the number of CPUs")
+	parser.add_argument("--force", action="store_true", help="regenerate files which have not changed")
+	args = parser.parse_args(argv)
+
+	stats = ingest_dir(args.dir, args.jobs, args.force)
+	seconds = max(stats['seconds'], 1e-9)
+	print("{:,} files ingested, {:,} unchanged, {:,} failed in {:.2f} seconds".format(
+		stats['files'], stats['skipped'], stats['failed'], stats['seconds']))
+	print("{:.1f} files/s, {:,.0f} words/s".format(stats['files'] / seconds, stats['words'] / seconds))
+	return 1 if stats['failed'] else 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -1,9 +1,171 @@
 import srt
 import os
+import io
+import re
+import codecs
+import hashlib
 import sys
 import sqlite3
 from sqlite3 import Error
+from itertools import islice
+from array import array
+import numpy as np
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from tokenizer import tokenize_all, TOKENIZER_VERSION
+import token_file
+
+# Number of bytes read from the start of a file to determine its encoding
+SNIFF_SIZE = 65536
+
+# Byte order marks and their encodings, UTF-32 marks begin with the UTF-16 marks so are checked first
+BOM_ENCODINGS = [
+	(codecs.BOM_UTF32_LE, "utf-32"),
+	(codecs.BOM_UTF32_BE, "utf-32"),
+	(codecs.BOM_UTF8, "utf-8-sig"),
+	(codecs.BOM_UTF16_LE, "utf-16"),
+	(codecs.BOM_UTF16_BE, "utf-16")
+]
+
+# Matches the timing line of a subtitle, ie) 00:01:02,500 --> 00:01:04,000
+TIMING_RE = re.compile(r"^\s*(\S+)\s*-->\s*(\S+)")
+
+# Number of subtitles tokenized at once by gen_token_rows()
+TOKENIZE_BATCH_SIZE = 1000
+
+# Number of rows written to the tokens table per executemany() call
+INSERT_BATCH_SIZE = 5000
+
+# Version of the word_db schema, stored in the database as PRAGMA user_version
+# 0: words (word, ordering, tstamp) and wordcount (word, count) tables without indexes
+# 1: vocab and tokens tables with integer word ids, words and wordcount are views
+# 2: source table, describing the subtitle file the database was generated from
+# 3: tokenizer column of the source table, the TOKENIZER_VERSION the words were split with
+SCHEMA_VERSION = 3
+
+# Directory holding a folder of db files for each subtitle
+DB_DIR = os.path.dirname(os.path.realpath(__file__)) + "/../../sub_files/db/"
+
+# Number of bytes read at a time when hashing a file
+HASH_CHUNK_SIZE = 1048576
+
+def sniff_encoding(path):
+	"""
+	Determines the text encoding of a file from its byte order mark, or from whether its start is valid UTF-8.
+	Files that are neither are read as latin-1, which can decode any byte
+	:param1 path: String representing path to a text file
+	:returns: String, the name of the encoding
+	"""
+	with open(path, 'rb') as myfile:
+		sample = myfile.read(SNIFF_SIZE)
+	return detect_encoding(sample)
+
+def detect_encoding(sample):
+	"""
+	Determines the text encoding of the start of a file, see sniff_encoding()
+	:param1 sample: Bytes, up to SNIFF_SIZE bytes from the start of a file
+	:returns: String, the name of the encoding
+	"""
+	for bom, encoding in BOM_ENCODINGS:
+		if sample.startswith(bom):
+			return encoding
+
+	# The sample may end partway through a character, so it is decoded as incomplete
+	try:
+		codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+	except UnicodeDecodeError:
+		return "latin-1"
+	return "utf-8"
+
+def iter_srt(path):
+	"""
+	Parses a srt file one line at a time, yielding its subtitles as they are read.
+	Any text before the first subtitle, or subtitle with an unreadable timestamp, is skipped
+	:param1 path: String representing path to a .srt file
+	:returns: A generator of Subtitle objects from the srt library
+	"""
+	# Characters which cannot be decoded are replaced, rather than failing the whole file
+	with open(path, 'r', encoding=sniff_encoding(path), errors="replace") as myfile:
+		yield from parse_srt_lines(myfile)
+
+def iter_srt_bytes(data):
+	"""
+	Parses the contents of a srt file held in memory, such as one read from a zip file, as iter_srt() parses a file
+	:param1 data: Bytes, the contents of a .srt file
+	:returns: A generator of Subtitle objects from the srt library
+	"""
+	with io.TextIOWrapper(io.BytesIO(data), encoding=detect_encoding(data[:SNIFF_SIZE]), errors="replace") as myfile:
+		yield from parse_srt_lines(myfile)
+
+def parse_srt_lines(lines):
+	"""
+	Parses the lines of a srt file, see iter_srt()
+	:param1 lines: An iterable of strings, such as an open text file
+	:returns: A generator of Subtitle objects from the srt library
+	"""
+	# Holds the subtitle currently being read, start is None between subtitles
+	index = 0
+	start = None
+	end = None
+	content = []
+	prev_line = ""
+
+	for line in lines:
+		line = line.rstrip("\r\n")
+		timing = TIMING_RE.match(line)
+		if timing is not None:
+			# The previous subtitle was not followed by an empty line, its last line is this index
+			if start is not None:
+				if content and content[-1].strip().isdigit():
+					content.pop()
+				yield srt.Subtitle(index, start, end, "\n".join(content))
+			# The index is the line before the timing, subtitles without one are numbered in order
+			index = int(prev_line) if prev_line.isdigit() else index + 1
+			try:
+				start = srt.srt_timestamp_to_timedelta(timing.group(1))
+				end = srt.srt_timestamp_to_timedelta(timing.group(2))
+			except srt.TimestampParseError:
+				start = None
+			content = []
+		elif start is not None:
+			# An empty line ends the subtitle
+			if line.strip() == "":
+				yield srt.Subtitle(index, start, end, "\n".join(content))
+				start = None
+			else:
+				content.append(line)
+		prev_line = line.strip()
+
+	if start is not None:
+		yield srt.Subtitle(index, start, end, "\n".join(content))
+
+def hash_file(path):
+	"""
+	Finds the BLAKE2 hash of a file's contents, reading it in chunks
+	:param1 path: String representing path to a file
+	:returns: String, the hash as hexadecimal digits
+	"""
+	file_hash = hashlib.blake2b()
+	with open(path, 'rb') as myfile:
+		chunk = myfile.read(HASH_CHUNK_SIZE)
+		while chunk:
+			file_hash.update(chunk)
+			chunk = myfile.read(HASH_CHUNK_SIZE)
+	return file_hash.hexdigest()
+
+def describe_source(path, data=None):
+	"""
+	Describes a subtitle file, for the source table of a word_db file
+	:param1 path: String representing path to a .srt file
+	:param2 data: Bytes, the contents of the file if they are already in memory, so the file is not read to hash it
+	:returns: Dictionary with return['path'], return['size'] in bytes, return['mtime'], and return['hash'], see hash_file()
+	"""
+	stat = os.stat(path)
+	return {
+		'path': os.path.realpath(path),
+		'size': stat.st_size,
+		'mtime': stat.st_mtime,
+		'hash': hash_file(path) if (data is None) else hashlib.blake2b(data).hexdigest()
+	}
 
 def load_srt(path):
 	"""
@@ -12,15 +174,7 @@ def load_srt(path):
 	:param1 path: String representing path to a .srt file
 	:returns: A list of Subtitle objects from the srt library
 	"""
-	with open(path, 'r', encoding= "latin-1") as myfile:
-		all_file_str = myfile.read()
-
-	for i in range(0, len(all_file_str), 1):
-		if (all_file_str[i] == '1'):
-			all_file_str = all_file_str[i:]
-			break
-	myfile.close()
-	return list(srt.parse(all_file_str))
+	return list(iter_srt(path))
 
 def load_word_list(path):
 	"""
@@ -34,21 +188,90 @@ def load_word_list(path):
 	word_list = []
 	# Attempt to open database file
 	try:
-		conn = sqlite3.connect(path)
+		conn = sqlite3.connect(migrate(path))
 	except:
 		return
 
 	c = conn.cursor()
 
 	# Add each word and time into list
-	for row in c.execute('''SELECT * FROM words ORDER BY tstamp'''):
-		word_list.append([row[0], row[2]])
+	for row in c.execute('''SELECT vocab.word, tokens.tstamp FROM tokens
+		JOIN vocab ON vocab.id = tokens.word_id ORDER BY tokens.tstamp, tokens.ordering'''):
+		word_list.append([row[0], row[1]])
 
-	# Save and Quit database file
-	conn.commit()
+	# Quit database file
 	conn.close()
 	return word_list
 
+def load_word_columns(path):
+	"""
+	Loads a word_db file, output from gen_word_db(), as parallel arrays in order of time of appearance
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:returns: Dictionary with return['vocab'] = list of words, vocab[word_id] is the word with that id |
+				return['word_id'] = uint32 array | return['tstamp'] = float64 array of seconds |
+				return['ordering'] = uint32 array of each word's order within the file
+	"""
+	# Attempt to open database file
+	try:
+		conn = sqlite3.connect(migrate(path))
+	except:
+		return
+
+	c = conn.cursor()
+
+	# Ids start at 1, any unused id is left as an empty string
+	vocab_rows = c.execute('''SELECT id, word FROM vocab''').fetchall()
+	vocab = [""] * (max((row[0] for row in vocab_rows), default=0) + 1)
+	for row in vocab_rows:
+		vocab[row[0]] = row[1]
+
+	# Rows are read into a single array and split into columns
+	rows = np.array(c.execute('''SELECT ordering, word_id, tstamp FROM tokens
+		ORDER BY tstamp, ordering''').fetchall(), dtype=np.float64).reshape(-1, 3)
+
+	# Quit database file
+	conn.close()
+	return {
+		'vocab': vocab,
+		'word_id': rows[:, 1].astype(np.uint32),
+		'tstamp': rows[:, 2].copy(),
+		'ordering': rows[:, 0].astype(np.uint32)
+	}
+
+def load_source(path):
+	"""
+	Finds the subtitle file a word_db file was generated from
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:returns: Dictionary in the format of describe_source(), with return['tokenizer'], the TOKENIZER_VERSION
+				the words were split with. None if the file or its source is not recorded
+	"""
+	if not (os.path.isfile(path)):
+		return None
+	# Attempt to open database file
+	try:
+		conn = sqlite3.connect(migrate(path))
+	except:
+		return
+
+	c = conn.cursor()
+	row = c.execute('''SELECT path, size, mtime, hash, tokenizer FROM source''').fetchone()
+
+	# Quit database file
+	conn.close()
+	if row is None:
+		return None
+	return {'path': row[0], 'size': row[1], 'mtime': row[2], 'hash': row[3], 'tokenizer': row[4]}
+
+def is_up_to_date(path, source):
+	"""
+	Determines whether a word_db file can be reused for a subtitle file, rather than generated again
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:param2 source: Dictionary describing the subtitle file, output from describe_source()
+	:returns: Boolean, True if the word_db was generated from the same contents with the current TOKENIZER_VERSION
+	"""
+	previous = load_source(path)
+	return (previous is not None) and (previous['hash'] == source['hash']) and (previous['tokenizer'] == TOKENIZER_VERSION)
+
 def load_word_count(path):
 	"""
 	Converts a word_db file, output from gen_word_db(), into a list of 
@@ -61,186 +284,294 @@ def load_word_count(path):
 	word_count = []
 	# Attempt to open database file
 	try:
-		conn = sqlite3.connect(path)
+		conn = sqlite3.connect(migrate(path))
 	except:
 		return
 
 	c = conn.cursor()
 
 	# Add each word and count into list
-	for row in c.execute('''SELECT * FROM wordcount ORDER BY count DESC'''):
+	for row in c.execute('''SELECT word, count FROM vocab ORDER BY count DESC, word ASC'''):
 		word_count.append([row[0], row[1]])
 
-	# Save and Quit database file
-	conn.commit()
+	# Quit database file
 	conn.close()
 	return word_count
 
-def gen_word_db(subtitle_list, dirname="custom"):
+def load_word_rank(path, word):
+	"""
+	Finds the rank of a word in a word_db file, by frequency. Ties are ranked alphabetically as in load_word_count()
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:param2 word: String, a lower case word
+	:returns: Integer, 1 for the most frequent word, 0 if the word is not in the file
+	"""
+	# Attempt to open database file
+	try:
+		conn = sqlite3.connect(migrate(path))
+	except:
+		return
+
+	c = conn.cursor()
+
+	rank = 0
+	row = c.execute('''SELECT count FROM vocab WHERE word = ?''', (word,)).fetchone()
+	if row is not None:
+		# Count the words ranked above this word
+		rank = 1 + c.execute('''SELECT COUNT(*) FROM vocab WHERE count > ? OR (count = ? AND word < ?)''',
+			(row[0], row[0], word)).fetchone()[0]
+
+	# Quit database file
+	conn.close()
+	return rank
+
+def count_words(path):
+	"""
+	Counts the words in a word_db file
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:returns: Integer, the number of words
+	"""
+	# Attempt to open database file
+	try:
+		conn = sqlite3.connect(migrate(path))
+	except:
+		return
+
+	c = conn.cursor()
+	count = c.execute('''SELECT COUNT(*) FROM tokens''').fetchone()[0]
+
+	# Quit database file
+	conn.close()
+	return count
+
+def create_schema(c):
+	"""
+	Creates the tables of a word_db file, at the current SCHEMA_VERSION. Indexes are created
+	separately by create_indexes(), so they can be built after the tables are filled
+	vocab: id, word, and count of every distinct word
+	tokens: ordering, word id, and time of every word in order of appearance
+	words and wordcount are views in the format of schema version 0
+	source: path, size, mtime, and hash of the subtitle file, see describe_source(), and the tokenizer version
+	:param1 c: A cursor on an empty database file
+	"""
+	c.execute('''CREATE TABLE vocab
+		(id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE, count INTEGER NOT NULL)''')
+
+	c.execute('''CREATE TABLE tokens
+		(ordering INTEGER PRIMARY KEY, word_id INTEGER NOT NULL, tstamp REAL NOT NULL)''')
+
+	c.execute('''CREATE VIEW words AS
+		SELECT vocab.word AS word, tokens.ordering AS ordering, tokens.tstamp AS tstamp
+		FROM tokens JOIN vocab ON vocab.id = tokens.word_id''')
+
+	c.execute('''CREATE VIEW wordcount AS SELECT word, count FROM vocab''')
+
+	create_source_table(c)
+
+	c.execute('''PRAGMA user_version = %d''' % SCHEMA_VERSION)
+
+def create_source_table(c):
+	"""
+	Creates the source table of a word_db file, which has at most one row
+	:param1 c: A cursor on a database file
+	"""
+	c.execute('''CREATE TABLE source
+		(path TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, hash TEXT NOT NULL, tokenizer INTEGER)''')
+
+def create_indexes(c):
 	"""
-	Converts a subtitle list into a sql database with two tables
-	One lists words in their order of appearance with timestamps
-	One lists words by their frequency
-	:param1 subtitle_list: A list of subtitles, output from load_srt()
+	Creates the indexes of a word_db file
+	:param1 c: A cursor on a database file, created by create_schema()
+	"""
+	# Finds every appearance of a word in order, used for phrase searches
+	c.execute('''CREATE INDEX tokens_word ON tokens (word_id, ordering)''')
+	# Lists words by time
+	c.execute('''CREATE INDEX tokens_tstamp ON tokens (tstamp)''')
+	# Lists words from most to least frequent
+	c.execute('''CREATE INDEX vocab_count ON vocab (count DESC, word)''')
+
+def migrate(path):
+	"""
+	Upgrades a word_db file to the current SCHEMA_VERSION, files already at this version are left unchanged
+	:param1 path: String, path to file containing word_db. Output of gen_word_db()
+	:returns: Path to database file
+	"""
+	conn = sqlite3.connect(path, isolation_level=None)
+	c = conn.cursor()
+
+	version = c.execute('''PRAGMA user_version''').fetchone()[0]
+	if (version == SCHEMA_VERSION):
+		conn.close()
+		return path
+
+	c.execute('''BEGIN''')
+	if (version == 0):
+		# Version 0 tables are renamed, so they can be replaced with views
+		c.execute('''ALTER TABLE words RENAME TO old_words''')
+		c.execute('''DROP TABLE IF EXISTS wordcount''')
+		create_schema(c)
+
+		# Word counts are regenerated, as version 0 counts were off by one
+		c.execute('''INSERT INTO vocab (word, count)
+			SELECT word, COUNT(*) FROM old_words GROUP BY word''')
+		c.execute('''INSERT INTO tokens (ordering, word_id, tstamp)
+			SELECT old_words.ordering, vocab.id, old_words.tstamp
+			FROM old_words JOIN vocab ON vocab.word = old_words.word''')
+		c.execute('''DROP TABLE old_words''')
+		create_indexes(c)
+	else:
+		# Each version after 1 adds to the previous schema
+		if (version < 2):
+			create_source_table(c)
+		elif (version < 3):
+			# Words split by an unknown tokenizer version are rebuilt, see is_up_to_date()
+			c.execute('''ALTER TABLE source ADD COLUMN tokenizer INTEGER''')
+		c.execute('''PRAGMA user_version = %d''' % SCHEMA_VERSION)
+	c.execute('''COMMIT''')
+
+	# Reclaim the space of the dropped tables
+	if (version == 0):
+		c.execute('''VACUUM''')
+	conn.close()
+	return path
+
+def gen_token_rows(subtitle_list, vocab, counts, progress=None):
+	"""
+	Generates a row for the tokens table for every word in a subtitle list
+	New words are given the next id in vocab, and the count of each word is kept in counts
+	:param1 subtitle_list: A list or generator of subtitles, output from load_srt() or iter_srt()
+	:param2 vocab: Dictionary, maps each word to its id. Ids start at 1
+	:param3 counts: List, counts[id - 1] is the number of appearances of the word with that id
+	:param4 progress: Function called with the number of subtitles tokenized so far, as each batch is tokenized
+	:returns: A generator of tuples (ordering, word_id, tstamp), ordering starts at 1
+	"""
+	# Holds the order of the words
+	wordCount = 0
+	cueCount = 0
+
+	# Subtitles are tokenized TOKENIZE_BATCH_SIZE at a time, each batch in a single pass
+	subtitles = iter(subtitle_list)
+	batch = list(islice(subtitles, TOKENIZE_BATCH_SIZE))
+	while batch:
+		cue_words = tokenize_all([sub.content for sub in batch])
+		cueCount += len(batch)
+		if progress is not None:
+			progress(cueCount)
+
+		# While there are remaining subtitles in the batch
+		for sub, words in zip(batch, cue_words):
+			tstamp = (sub.end).total_seconds()
+			for word in words:
+				wordCount += 1
+				word_id = vocab.get(word)
+				if word_id is None:
+					counts.append(0)
+					word_id = vocab[word] = len(counts)
+				counts[word_id - 1] += 1
+				yield (wordCount, word_id, tstamp)
+		batch = list(islice(subtitles, TOKENIZE_BATCH_SIZE))
+
+def gen_word_db(subtitle_list, dirname="custom", fast_ingest=False, source=None, progress=None, cancel=None):
+	"""
+	Converts a subtitle list into a sql database, see create_schema()
+	It lists words in their order of appearance with timestamps, and words by their frequency
+	:param1 subtitle_list: A list or generator of subtitles, output from load_srt(), iter_srt(), or iter_srt_bytes()
 	:param2 dirname: Name of folder to store db files in, default to "custom"
+	:param3 fast_ingest: Boolean, if True the database is written without a journal or syncing to disk.
+	A crash while writing can corrupt the file, which is rebuilt when the subtitle is next opened
+	:param4 source: Dictionary describing the subtitle file, output from describe_source(). Not recorded if None
+	:param5 progress: Function called with the number of subtitles read and words written, after each batch of words is written
+	:param6 cancel: Object whose check() method raises to stop writing, such as a network.CancelToken.
+	It is called between batches of words, and the unfinished database file is deleted before the exception is passed on
 	:returns: Path to database file
 	"""
 
-	path = sys.path[0] + "/../../sub_files/db/" + dirname
+	path = DB_DIR + dirname
 	if not (os.path.isdir(path)):
-		os.mkdir(path)
+		os.makedirs(path)
+
+	# Delete the database file if it already exists, along with its binary token file
+	if (os.path.isfile(path + "/words.db")):
+		os.remove(path + "/words.db")
+	if (os.path.isfile(token_file.token_file_path(path + "/words.db"))):
+		os.remove(token_file.token_file_path(path + "/words.db"))
 	
-	# Create the database file
+	# Create the database file, transactions are started and ended explicitly
 	try:
-		conn = sqlite3.connect(path + "/words.db")
+		conn = sqlite3.connect(path + "/words.db", isolation_level=None)
 	except:
 		return
 
 	
 	c = conn.cursor()
-	
-	# Delete tables if they already exist
-	c.execute('''DROP TABLE IF EXISTS words''')
-	c.execute('''DROP TABLE IF EXISTS wordcount''')
 
-	# Create words table
-	c.execute('''CREATE TABLE words 
-		(word text, ordering int, tstamp real)''')
+	# Pragmas must be set before the transaction begins
+	if (fast_ingest):
+		c.execute('''PRAGMA journal_mode = OFF''')
+		c.execute('''PRAGMA synchronous = OFF''')
+		c.execute('''PRAGMA temp_store = MEMORY''')
+
+	# The whole database is written in a single transaction
+	c.execute('''BEGIN''')
+	create_schema(c)
 
-	# Create word count table
-	c.execute('''CREATE TABLE wordcount
-		(word text, count int)''')
+	# Add all words to tokens table, INSERT_BATCH_SIZE rows at a time
+	vocab = {}
+	counts = []
+	# Number of subtitles tokenized so far, updated by gen_token_rows() as it tokenizes each batch
+	cueCount = [0]
+	def count_cues(cues):
+		cueCount[0] = cues
+	rows = gen_token_rows(subtitle_list, vocab, counts, progress=count_cues)
+	# Columns of every inserted row, kept for the binary token file in typed arrays rather than a Python object per word
+	columns = (array('I'), array('I'), array('d'))
+	try:
+		batch = list(islice(rows, INSERT_BATCH_SIZE))
+		while batch:
+			try:
+				c.executemany("INSERT INTO tokens (ordering, word_id, tstamp) VALUES (?, ?, ?)", batch)
+			except Error as e:
+				print(e)
+			else:
+				# Rows are only kept once they are in the database, so both files hold the same words
+				for column, values in zip(columns, zip(*batch)):
+					column.extend(values)
+			if progress is not None:
+				progress(cueCount[0], len(columns[0]))
+			if cancel is not None:
+				cancel.check()
+			batch = list(islice(rows, INSERT_BATCH_SIZE))
+	except BaseException:
+		# The transaction is rolled back, removing its journal, and the unfinished file is deleted
+		c.execute('''ROLLBACK''')
+		conn.close()
+		os.remove(path + "/words.db")
+		raise
 
-	# Add all words to word table
+	# Add every distinct word and its count to vocab table
+	c.executemany("INSERT INTO vocab (id, word, count) VALUES (?, ?, ?)",
+		((word_id, word, counts[word_id - 1]) for word, word_id in vocab.items()))
 
-	# Holds the order of the words
-	wordCount = 0
+	# Record the subtitle file the words were read from
+	if source is not None:
+		c.execute("INSERT INTO source (path, size, mtime, hash, tokenizer) VALUES (?, ?, ?, ?, ?)",
+			(source['path'], source['size'], source['mtime'], source['hash'], TOKENIZER_VERSION))
 
-	# While there are remaining subtitles in subtitle list
-	for sub in subtitle_list:
-		currWord = ""
-		i = 0
-		# While there are characters left in this subtitle
-		while (i < len(sub.content)):
-			currChar = sub.content[i]
-			# If there is a (, [, {, <, any characters between them and the corresponding closing brace is disregarded
-			# This handles sound effects and custom fonts
-			# Emulates a do while loop for checking for ()
-			if (currChar == '('):
-				while True:
-					i += 1
-					currChar = sub.content[i]
-					if (currChar == ')'):
-						if (i < len(sub.content) - 1):
-							i += 1
-							currChar = sub.content[i]
-						break
-
-			# Emulates a do while loop for checking for []
-			if (currChar == '['):
-				while True:
-					i += 1
-					currChar = sub.content[i]
-					if (currChar == ']'):
-						if (i < len(sub.content) - 1):
-							i += 1
-							currChar = sub.content[i]
-						break
-
-			# Emulates a do while loop for checking for {}
-			if (currChar == '{'):
-				while True:
-					i += 1
-					currChar = sub.content[i]
-					if (currChar == '}'):
-						if (i < len(sub.content) - 1):
-							i += 1
-							currChar = sub.content[i]
-						break
-
-			# Emulates a do while loop for checking for <>
-			if (currChar == '<'):
-				while True:
-					i += 1
-					currChar = sub.content[i]
-					if (currChar == '>'):
-						if (i < len(sub.content) - 1):
-							i += 1
-							currChar = sub.content[i]
-						break
-			
-			# If there is a -, the preceding word is removed if there is a " " following and no spaces have been encountered yet. 
-			# Otherwise it is changed to a space
-			# This handles hyphenated words and character names, removing character names and seperating hyphenated words
-			if (currChar == '-'):
-				if (i < len(sub.content) - 1):
-					if (sub.content[i + 1] == ' '):
-						currWord = ""
-					else:
-						currChar = " "
-				else:
-					currChar = "\0"
-			# If there is a :, then it is maintained if the preceding and following characters are numbers
-			# If there is a following space and there are no encountered spaces in the string, the preceding word is removed
-			# Otherwise the : is disregarded and changed to an empty character
-			# This handles times ie) 8:45 and character names. Otherwise colons are removed
-			elif (currChar == ':'):
-				if (i < len(sub.content) - 1) and (i != 0):
-					if (sub.content[i + 1] == ' '):
-						currWord = ""
-						currChar = " "
-					elif ((ord(sub.content[i - 1]) < 48) or (ord(sub.content[i - 1]) > 57)) or ((ord(sub.content[i + 1]) < 48) or (ord(sub.content[i + 1]) > 57)):
-						currChar = "\0"
-				else:
-					currChar = "\0"
-			# If the current character is valid, 0-9, a-z, A-Z, ', :. They are added to the current word. 
-			if (ord(currChar) == 58) or (ord(currChar) == 39) or ((ord(currChar) >= 48) and (ord(currChar) <= 57)) or ((ord(currChar) >= 65) and (ord(currChar) <= 90)) or ((ord(currChar) >= 97) and (ord(currChar) <= 122)):
-				currWord += currChar
-			elif not ((currWord == "\0") or (currWord == "") or (currWord == " ") or (currWord == "\t")):
-				# If the current character is a " " or "\n", the current word is added to the word list.
-				# Current Word Count is iterated, spaceFound is set to false, the current word is set to an empty string
-				if (ord(currChar) == 32) or (currChar == '\n') or (i == len(sub.content) - 1):
-					wordCount += 1
-					# Create tuple of values and insert into table
-					values = (currWord.lower(), wordCount, (sub.end).total_seconds())
-					try:
-						c.execute("INSERT INTO words (word, ordering, tstamp) VALUES (?, ?, ?)", values)
-					except Error as e:
-						print(e)
-					# Reset current word to empty
-					currWord = ""
-			# Current index is iterated
-			i += 1
-
-	# Generate word count table
-	word_table = c.execute('''SELECT word FROM words ORDER BY word''')
-	# countedWords holds the frequency of each word
-	countedWords = 0
-	# activeWord is the word currently being observed
-	activeWord = (c.fetchone())[0]
-	# countWord is used to compare with activeWord to ensure the correct word is being counted
-	countWord = activeWord
-	# This cursor is created so the table can both be observed and added to within the same loop
-	command = conn.cursor()
-
-	# Cycle through every row in the table
-	for row in word_table:
-		# Incriment count
-		countedWords += 1
-		# activeWord is the word within this row of the table
-		activeWord = row[0]
-		# If the activeWord does not match the countWord then a new word has been encountered
-		if (activeWord != countWord):
-			# Add the current word and its count to the table
-			values = (countWord, countedWords)
-			command.execute('''INSERT INTO wordcount (word, count) VALUES(?, ?)''', values)
-			# Update countWord
-			countWord = activeWord
-			countedWords = 0
+	# Indexes are built once all rows are added
+	create_indexes(c)
 
 	# Save and Quit database file
-	conn.commit()
+	c.execute('''COMMIT''')
 	conn.close()
 
+	# Write the binary token file in the order of load_word_columns()
+	orderings = np.frombuffer(columns[0], dtype=np.uintc)
+	tstamps = np.frombuffer(columns[2], dtype=np.float64)
+	order = np.lexsort((orderings, tstamps))
+	id_vocab = [""] * (len(counts) + 1)
+	for word, word_id in vocab.items():
+		id_vocab[word_id] = word
+	token_file.write_token_file(token_file.token_file_path(path + "/words.db"), id_vocab,
+		np.frombuffer(columns[1], dtype=np.uintc)[order], tstamps[order], orderings[order])
+
 	# Return path to database file
 	return (path + "/words.db")
\ No newline at end of file
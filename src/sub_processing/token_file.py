@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+A binary copy of a film's words, written next to its word_db file. The arrays are used directly from
+the file with np.memmap, so a film is opened without reading or converting any rows.
+
+Layout, little endian:
+	header: magic, version, token count, vocab id count, vocab blob size, see HEADER
+	word_id: uint32 array, in order of time of appearance
+	tstamp: float32 array of seconds
+	ordering: uint32 array, each word's order within the subtitle file
+	vocab: utf-8 words seperated by newlines, the word at line n has id n
+"""
+
+#imports
+import os
+import struct
+import numpy as np
+
+# Name of the binary file in the folder of a word_db file
+TOKEN_FILE_NAME = "words.bin"
+
+TOKEN_FILE_MAGIC = b"FSAWORDS"
+
+# Version of the layout, a file with any other version is not read
+TOKEN_FILE_VERSION = 1
+
+# magic, version, token count, vocab id count, vocab blob size, padded to 32 bytes so the arrays are aligned
+HEADER = struct.Struct("<8sIIIQ4x")
+
+def token_file_path(dbpath):
+	"""
+	:param1 dbpath: String, path to file containing word_db. Output of gen_word_db()
+	:returns: String, path to the binary file of the same film
+	"""
+	return os.path.join(os.path.dirname(dbpath), TOKEN_FILE_NAME)
+
+def write_token_file(path, vocab, word_ids, tstamps, orderings):
+	"""
+	Writes the words of a film as a binary file. The file is replaced only once it is completely written
+	:param1 path: String, path to the binary file
+	:param2 vocab: A list of words, vocab[word_id] is the word with that id, unused ids are empty strings
+	:param3 word_ids: An array of word ids in order of time of appearance
+	:param4 tstamps: An array of times in seconds, for each word
+	:param5 orderings: An array of each word's order within the subtitle file
+	"""
+	blob = "\n".join(vocab).encode("utf-8")
+	with open(path + ".tmp", "wb") as f:
+		f.write(HEADER.pack(TOKEN_FILE_MAGIC, TOKEN_FILE_VERSION, len(word_ids), len(vocab), len(blob)))
+		f.write(np.asarray(word_ids, dtype="<u4").tobytes())
+		f.write(np.asarray(tstamps, dtype="<f4").tobytes())
+		f.write(np.asarray(orderings, dtype="<u4").tobytes())
+		f.write(blob)
+	os.replace(path + ".tmp", path)
+
+def load_token_file(path):
+	"""
+	Opens a binary file written by write_token_file(), the arrays are mapped from the file rather than read
+	:param1 path: String, path to the binary file
+	:returns: Dictionary in the format of load_word_columns(), with a float32 return['tstamp'],
+				None if the file is missing or not readable
+	"""
+	try:
+		with open(path, "rb") as f:
+			magic, version, tokens, vocab_size, blob_size = HEADER.unpack(f.read(HEADER.size))
+	except (OSError, struct.error):
+		return None
+	if (magic != TOKEN_FILE_MAGIC) or (version != TOKEN_FILE_VERSION):
+		return None
+	if (os.path.getsize(path) != HEADER.size + 12 * tokens + blob_size):
+		return None
+
+	# A film without words can not be mapped, as memmap requires a non empty array
+	if (tokens == 0):
+		word_ids = np.zeros(0, dtype=np.uint32)
+		tstamps = np.zeros(0, dtype=np.float32)
+		orderings = np.zeros(0, dtype=np.uint32)
+	else:
+		word_ids = np.memmap(path, dtype="<u4", mode="r", offset=HEADER.size, shape=(tokens,))
+		tstamps = np.memmap(path, dtype="<f4", mode="r", offset=HEADER.size + 4 * tokens, shape=(tokens,))
+		orderings = np.memmap(path, dtype="<u4", mode="r", offset=HEADER.size + 8 * tokens, shape=(tokens,))
+
+	with open(path, "rb") as f:
+		f.seek(HEADER.size + 12 * tokens)
+		vocab = f.read(blob_size).decode("utf-8").split("\n")
+	if (len(vocab) != vocab_size):
+		return None
+	return {'vocab': vocab, 'word_id': word_ids, 'tstamp': tstamps, 'ordering': orderings}
@@ -0,0 +1,62 @@
+import re
+
+# Version of the word rules below. It is increased whenever they change, so word_db files
+# generated with the previous rules are rebuilt when their subtitle is next opened
+# 1: regex rules. 2: a removed span no longer lets the - or : before it mark a character name
+TOKENIZER_VERSION = 2
+
+# Seperates subtitles when a whole film is tokenized at once, it is never kept within a word
+CUE_SEP = "\x00"
+
+# Text between (), [], {} and <> is disregarded, this handles sound effects and custom fonts.
+# An unclosed brace is disregarded up to the end of the subtitle
+SPAN_RE = re.compile(r"\([^)\x00]*\)?|\[[^\]\x00]*\]?|\{[^}\x00]*\}?|<[^>\x00]*>?")
+
+# Left in place of a removed span until the last pass deletes it, so the characters around the span are not
+# taken to be next to each other, ie) the - in "was-(coughs) going" is not followed by a space
+SPAN_MARK = "\x01"
+
+# A word followed by "- " or ": " is a character name and is removed. This is matched on the
+# reversed text, ie) "JOHN: hi" -> "ih :NHOJ", so the search can start at the - or :
+LABEL_RE = re.compile(r" [-:][^ \n\x00-]*")
+
+# A : is only maintained between two numbers, ie) 8:45
+COLON_RE = re.compile(r":(?:(?![0-9])|(?<![0-9]:))")
+
+# Only 0-9, a-z, A-Z, ' and : are kept within a word, spaces and newlines seperate words.
+# Every other ascii character is deleted, including SPAN_MARK, non ascii characters are dropped on encoding
+INVALID_BYTES = bytes(b for b in range(128) if not (chr(b).isalnum() or chr(b) in "': \n\x00"))
+
+def clean_text(text):
+	"""
+	Applies the word rules to subtitle text, leaving only lower case words seperated by whitespace
+	:param1 text: String, the content of one or more subtitles seperated by CUE_SEP
+	:returns: String, the cleaned text
+	"""
+	text = SPAN_RE.sub(SPAN_MARK, text)
+	text = LABEL_RE.sub(" ", text[::-1])[::-1]
+	# Any remaining - seperates hyphenated words
+	text = text.replace("-", " ")
+	text = COLON_RE.sub("", text)
+	return text.encode("ascii", "ignore").translate(None, INVALID_BYTES).lower().decode("ascii")
+
+def tokenize(cue):
+	"""
+	Splits the content of a single subtitle into a list of lower case words
+	ex) "JOHN: (laughs) It's 8:45, well-known." -> ["it's", "8:45", "well", "known"]
+	:param1 cue: String, the content of a subtitle
+	:returns: A list of strings, the words of the subtitle in their order of appearance
+	"""
+	return clean_text(cue.replace(CUE_SEP, "")).split()
+
+def tokenize_all(cues):
+	"""
+	Tokenizes a list of subtitle contents in a single pass over the joined text
+	:param1 cues: A list of strings, the content of each subtitle
+	:returns: A list of lists of strings, tokenize(cue) for each cue
+	"""
+	text = CUE_SEP.join(cues)
+	# A subtitle containing the seperator would misalign the results
+	if (text.count(CUE_SEP) != len(cues) - 1):
+		return [tokenize(cue) for cue in cues]
+	return [words.split() for words in clean_text(text).split(CUE_SEP)]
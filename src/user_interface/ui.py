@@ -1,13 +1,14 @@
 import sys
 from math import ceil
 sys.path.append(sys.path[0] + "/../")
-from film_processing.film_data import get_movie_info, search_for_movie, fixIMDBurl, get_sub_files, clean_sub_dir, get_IMDB_ID
+from film_processing.film_data import get_film_info, get_sub_files, clean_sub_dir, get_IMDB_ID
 from film_processing.sub_data import SubtitleData, get_nth_string
 from sub_processing.srt_parsing import *
 from PyQt5.QtWidgets import QMainWindow, QApplication, QWidget, QGridLayout, QPushButton, QAction, QLabel, QVBoxLayout, \
     QFrame, QDialog, QPlainTextEdit, QLineEdit, QTabWidget, QGroupBox, QFileDialog, QInputDialog, QMessageBox
 from PyQt5.QtGui import QFont, QPalette, QPixmap
 from PyQt5 import QtCore
+from workers import NetworkTask, StreamingTask, IngestTask
 
 class Gui(QMainWindow):
 
@@ -51,7 +52,8 @@ class Gui(QMainWindow):
         # 30 Rows, 52 columns
         #gridlayout.addWidget(widget, startRow, startCol, #rows, #cols)
         gridLayout = QGridLayout()
-        gridLayout.addWidget(self.progTitle, 0, 0, 1, 52)
+        gridLayout.addWidget(self.progTitle, 0, 0, 1, 46)
+        gridLayout.addWidget(self.ingestCancelButton, 0, 46, 1, 6)
         gridLayout.addWidget(self.listTabs, 1, 0, 30, 18)
         gridLayout.addWidget(self.graphInfo, 1, 18, 2, 34)
         gridLayout.addWidget(self.graphLabel, 3, 18, 28, 34)
@@ -257,6 +259,14 @@ class Gui(QMainWindow):
         self.progTitle.setGeometry(0, 0, 1000, 27)
         self.progTitle.setFont(self.bigFont)
 
+        # The subtitle file being opened in the background, if any, and a button to cancel it
+        self.ingestTask = None
+        # A file to open once the file being opened is cancelled, see startIngestTask()
+        self.pendingIngest = None
+        self.ingestCancelButton = QPushButton("Cancel", self)
+        self.ingestCancelButton.clicked.connect(self.cancelIngestTask)
+        self.ingestCancelButton.setVisible(False)
+
     def resetUI(self):
         self.movieTitle = ""
         # Creates a Label for the main dialog title
@@ -363,6 +373,139 @@ class Gui(QMainWindow):
         """
         self.progTitle.setText(title)
 
+    def startIngestTask(self, fileName, movieTitle, opened):
+        """
+        Opens a subtitle file off the user interface thread, showing its progress in the main dialog title
+        next to a cancel button. subData is replaced only once the file is opened
+        :param fileName: string, path to a .srt file
+        :param movieTitle: string, the title shown for the file
+        :param opened: function called once subData holds the opened file
+        """
+        if (self.ingestTask is not None):
+            # Only one file is opened at a time, as two could write the same word_db file.
+            # The file being opened is cancelled, and this one is started once it stops, see endIngestTask()
+            self.pendingIngest = (fileName, movieTitle, opened)
+            self.ingestTask.cancel()
+            self.ingestCancelButton.setVisible(True)
+            self.setTitle("Opening \"" + movieTitle + "\"")
+            return
+        # Title shown again if the file is not opened
+        self.ingestPreviousTitle = self.progTitle.text()
+
+        # The view tabs and emptying files wait until the file is opened
+        self.phraseButton.setEnabled(False)
+        self.countButton.setEnabled(False)
+        self.varietyButton.setEnabled(False)
+        self.cleanButton.setEnabled(False)
+        self.ingestCancelButton.setVisible(True)
+        self.runIngestTask(fileName, movieTitle, opened)
+
+    def runIngestTask(self, fileName, movieTitle, opened):
+        """
+        Starts opening a subtitle file in the background, see startIngestTask()
+        """
+        # The words of the opened film are released from memory, in case their files are replaced
+        self.subData.clear_cache()
+        self.ingestData = SubtitleData()
+        self.ingestTitle = movieTitle
+        self.ingestOpened = opened
+        self.ingestTask = IngestTask(self.ingestData.open_subtitle, fileName)
+        self.ingestTask.signals.progress.connect(self.showIngestProgress)
+        self.ingestTask.signals.finished.connect(self.ingestFinished)
+        self.ingestTask.signals.failed.connect(self.ingestFailed)
+        self.ingestTask.signals.cancelled.connect(self.ingestCancelled)
+        self.setTitle("Opening \"" + movieTitle + "\"")
+        self.ingestTask.start()
+
+    def isIngestSignal(self):
+        """
+        :returns: True if the signal being handled is from the task opening a file
+        """
+        return (self.ingestTask is not None) and (self.sender() is self.ingestTask.signals)
+
+    def showIngestProgress(self, cues, words):
+        """
+        Shows the progress of the file being opened in the main dialog title
+        :param cues: integer, number of subtitles read
+        :param words: integer, number of words written
+        """
+        if self.isIngestSignal():
+            self.setTitle("Opening \"%s\": %d subtitles, %d words" % (self.ingestTitle, cues, words))
+
+    def endIngestTask(self):
+        """
+        Starts opening the file waiting for the ended task, if there is one.
+        Otherwise hides the cancel button, and enables emptying files again
+        :returns: True if a waiting file was started, the ended task's result is then disregarded
+        """
+        self.ingestTask = None
+        if (self.pendingIngest is not None):
+            fileName, movieTitle, opened = self.pendingIngest
+            self.pendingIngest = None
+            self.runIngestTask(fileName, movieTitle, opened)
+            return True
+        self.ingestCancelButton.setVisible(False)
+        self.cleanButton.setEnabled(True)
+        return False
+
+    def ingestFinished(self, result):
+        """
+        Replaces subData with the opened file, and shows it
+        :param result: the result of SubtitleData.open_subtitle(), unused
+        """
+        if self.isIngestSignal() and not self.endIngestTask():
+            self.subData = self.ingestData
+            self.movieTitle = self.ingestTitle
+            self.ingestOpened()
+
+    def ingestFailed(self, error):
+        """
+        Returns to the previously opened file, and shows an error window
+        :param error: the exception raised while opening the file
+        """
+        if self.isIngestSignal() and not self.endIngestTask():
+            self.restoreSubtitle()
+            self.showError("Subtitle File Could Not Be Opened")
+
+    def ingestCancelled(self):
+        """
+        Returns to the previously opened file
+        """
+        if self.isIngestSignal() and not self.endIngestTask():
+            self.restoreSubtitle()
+
+    def cancelIngestTask(self):
+        """
+        Cancels opening a file, triggered by the cancel button. The file stops being read at its next batch of words
+        """
+        if (self.ingestTask is not None):
+            self.pendingIngest = None
+            self.ingestCancelButton.setVisible(False)
+            self.setTitle("Cancelling...")
+            self.ingestTask.cancel()
+
+    def restoreSubtitle(self):
+        """
+        Returns the main dialog to the file opened before a file that was not opened.
+        If that file's words were deleted while replacing them, the main dialog is reset
+        """
+        if (os.path.isfile(self.subData.dbpath)):
+            self.setTitle(self.ingestPreviousTitle)
+            self.phraseButton.setEnabled(True)
+            self.countButton.setEnabled(True)
+            self.varietyButton.setEnabled(True)
+        else:
+            self.resetUI()
+
+    def closeEvent(self, event):
+        """
+        Cancels opening a file when the main window is closed, so the program does not wait for it
+        """
+        if (self.ingestTask is not None):
+            self.pendingIngest = None
+            self.ingestTask.cancel()
+        super().closeEvent(event)
+
     def openFile(self):
         """
         Opens a file search dialog using the preset QFileDialog. Used to open .srt files
@@ -372,46 +515,44 @@ class Gui(QMainWindow):
         options |= QFileDialog.DontUseNativeDialog
         fileName, _ = QFileDialog.getOpenFileName(self, "Open a Subtitle File","../../sub_files/srt","Subtitle Files (*.srt);;All Files (*)", options=options)
         if (fileName):
-            # Attempts to open a file
-            try:
-
-                # Sets the subData to data held in selected file
-                self.subData.open_subtitle(fileName)
-                # Sets movieTitle to name up subtitle file, up to 33 characters
-                self.movieTitle = fileName.split("/")[-1]
-                if (len(self.movieTitle) > 43):
-                    self.movieTitle = fileName.split("/")[-1][0:40] + "..."
-
-                # Sets the title of the main dialog
-                self.setTitle("Subtitle for \"" + self.movieTitle + "\" opened")
-
-                # Sets List to raw subtitle text
-                self.setListFile(self.subData.subpath, " ", self.subRawContent, self.countInfo)
-
-                # Load word_db.db to list
-                self.setListCount(self.subData.dbpath, "# Frequency   Word                                    # Occurences", self.wordCountContent, self.countInfo)
-                # Load word_db.db to list
-                self.setListWord(self.subData.dbpath, "# Word            Word                                    Time (seconds)", self.wordListContent, self.listInfo)
-                self.listTabs.setCurrentIndex(0)
-                self.listTabs.setVisible(True)
-
-                # View the word count graph
-                self.viewWordCount()
-
-                # If a file is opened, the subtabs in the view tab become enabled. The main dialog elements become visible
-                self.phraseButton.setEnabled(True)
-                self.countButton.setEnabled(True)
-                self.varietyButton.setEnabled(True)
-                self.graphLabel.setVisible(True)
-                self.graphInfo.setVisible(True)
-            # If file cannot be opened, an error window is created
-            except:
-                print("Subtitle File Could Not Be Opened") # Change to warning dialog
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Critical)
-                msg.setText("Subtitle File Could Not Be Opened")
-                msg.setWindowTitle("Error")
-                msg.exec()
+            # Sets movieTitle to name up subtitle file, up to 43 characters
+            movieTitle = fileName.split("/")[-1]
+            if (len(movieTitle) > 43):
+                movieTitle = fileName.split("/")[-1][0:40] + "..."
+            # The file is opened in the background, see fileOpened()
+            self.startIngestTask(fileName, movieTitle, self.fileOpened)
+
+    def fileOpened(self):
+        """
+        Shows a subtitle file opened from the file dialog, once subData holds it
+        """
+        # Attempts to show the file
+        try:
+            # Sets the title of the main dialog
+            self.setTitle("Subtitle for \"" + self.movieTitle + "\" opened")
+
+            # Sets List to raw subtitle text
+            self.setListFile(self.subData.subpath, " ", self.subRawContent, self.countInfo)
+
+            # Load word_db.db to list
+            self.setListCount(self.subData.dbpath, "# Frequency   Word                                    # Occurences", self.wordCountContent, self.countInfo)
+            # Load word_db.db to list
+            self.setListWord(self.subData.dbpath, "# Word            Word                                    Time (seconds)", self.wordListContent, self.listInfo)
+            self.listTabs.setCurrentIndex(0)
+            self.listTabs.setVisible(True)
+
+            # View the word count graph
+            self.viewWordCount()
+
+            # If a file is opened, the subtabs in the view tab become enabled. The main dialog elements become visible
+            self.phraseButton.setEnabled(True)
+            self.countButton.setEnabled(True)
+            self.varietyButton.setEnabled(True)
+            self.graphLabel.setVisible(True)
+            self.graphInfo.setVisible(True)
+        # If file cannot be opened, an error window is created
+        except:
+            self.showError("Subtitle File Could Not Be Opened")
 
     def viewPhrase(self):
         """
@@ -504,7 +645,10 @@ class Gui(QMainWindow):
         # Initializes Dialog, and its title and size
         self.movieDialog = QDialog()
         self.movieDialog.setWindowTitle("Film Search")
-        self.movieDialog.setFixedSize(425, 300)
+        self.movieDialog.setFixedSize(425, 325)
+        # The search or download running in the background, if any
+        self.movieTask = None
+        self.subscene_info = None
 
         # Initializes title label for search box
         self.searchLabel = QLabel("Search for a movie: ", self.movieDialog)
@@ -533,7 +677,7 @@ class Gui(QMainWindow):
         self.searchCancelButton = QPushButton("Cancel", self.movieDialog)
         self.searchCancelButton.resize(80, 30)
         self.searchCancelButton.move(330, 130)
-        self.searchCancelButton.clicked.connect(self.movieDialog.reject)
+        self.searchCancelButton.clicked.connect(self.cancelMovieDialog)
 
         # Initializes Group Box for movie information
         self.infoGroup = QGroupBox("Movie Info", self.movieDialog)
@@ -559,10 +703,20 @@ class Gui(QMainWindow):
         self.infoGrid.addWidget(self.imdbLabel, 5, 0)
         self.infoGroup.setLayout(self.infoGrid)
 
+        # Initializes label for the progress of a search or download
+        self.statusLabel = QLabel("", self.movieDialog)
+        self.statusLabel.setGeometry(18, 292, 390, 25)
+
     def resetMovieDialog(self):
         """
         Sets the elements in the movie dialog to their default positions
         """
+        # Cancels any search or download left running, ignoring its signals
+        if (self.movieTask is not None):
+            self.movieTask.disconnect()
+            self.movieTask.cancel()
+            self.movieTask = None
+        self.subscene_info = None
         # Sets buttons back to default positions
         self.searchButton.setEnabled(True)
         self.searchOkButton.setEnabled(False)
@@ -575,6 +729,56 @@ class Gui(QMainWindow):
         self.castLabel.setText("")
         self.runLabel.setText("")
         self.imdbLabel.setText("")
+        self.statusLabel.setText("")
+
+    def cancelMovieDialog(self):
+        """
+        Cancels the running search or download, or closes the movie dialog if there is none.
+        This is triggered when the CANCEL button is pressed.
+        """
+        if (self.movieTask is not None) and (self.movieTask.isRunning()):
+            self.movieTask.cancel()
+        else:
+            self.closeMovieDialog()
+
+    def startMovieTask(self, fn, *args, finished=None, failed=None, partial=None):
+        """
+        Runs a search or download off the user interface thread, showing its progress in the movie dialog
+        :param fn: function to run, see NetworkTask
+        :param finished: function called with the result of fn
+        :param failed: function called with the exception raised by fn
+        :param partial: function called with each partial result of fn, see StreamingTask. fn does not report any if None
+        """
+        if (partial is not None):
+            self.movieTask = StreamingTask(fn, *args)
+            self.movieTask.partial.connect(partial)
+        else:
+            self.movieTask = NetworkTask(fn, *args)
+        self.movieTask.progress.connect(self.statusLabel.setText)
+        self.movieTask.finished.connect(finished)
+        self.movieTask.failed.connect(failed)
+        self.movieTask.cancelled.connect(self.movieTaskCancelled)
+        self.movieTask.start()
+
+    def movieTaskCancelled(self):
+        """
+        Returns the movie dialog to a state where a new search can be started
+        """
+        self.statusLabel.setText("Cancelled")
+        self.searchButton.setEnabled(True)
+        self.searchOkButton.setEnabled(self.subscene_info is not None)
+
+    def showError(self, text):
+        """
+        Shows an error window
+        :param text: string, the error message
+        """
+        print(text)
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Critical)
+        msg.setText(text)
+        msg.setWindowTitle("Error")
+        msg.exec()
 
     def searchMovie(self):
         """
@@ -595,50 +799,74 @@ class Gui(QMainWindow):
         self.castLabel.setText("Cast: ?")
         self.runLabel.setText("Runtime: ?")
         self.imdbLabel.setText("IMDB URL: ?")
-        # Attempts to gather movie subscene
-        try:
-            self.subscene_info = search_for_movie(search_text)
-        # If unsuccessful, subscene_info is set to none
-        except:
-            self.subscene_info = None
-        # If successful imdb info is attempted to be found
-        if (self.subscene_info is not None):
-            # Fixes the imdb url, as subscene movie information often includes a broken imdb url
-            self.subscene_info['url'] = fixIMDBurl(self.subscene_info['url'])
-            # Attempts to get the imdb info about a film
-            try:
-                # Collects imdb info about the movie using the url from subscene
-                imdb_info = get_movie_info(self.subscene_info['url'])
-                # Sets the movie info labels to imdb info
-                self.nameLabel.setText("Title: " + imdb_info['title'])
-                self.yearLabel.setText("Year: " + imdb_info['year'])
-                self.dirLabel.setText("Director: " + imdb_info['director'])
-                self.castLabel.setText("Cast: " + imdb_info['cast'])
-                self.runLabel.setText("Runtime: " + imdb_info['runtime'])
-                self.imdbLabel.setText('<a href=\"' + self.subscene_info['url'] + '\">IMDB</a>')
-                # Re-enables OK Button
-                self.searchOkButton.setEnabled(True)
-            # If unsuccessful, movie info is pulled from subscene
-            except:
-                print("IMDB Info could not be found")
-                # Sets movie info labels to subscene info 
-                self.nameLabel.setText("Title: " + self.subscene_info['title'])
-                self.yearLabel.setText("Year: " + str(self.subscene_info['year']))
+        self.subscene_info = None
+        # Searches subscene and IMDB at once in the background, filling in labels as each answers, see showMovieInfo()
+        self.startMovieTask(get_film_info, search_text, finished=self.showMovieInfo, failed=self.searchFailed,
+            partial=self.showPartialInfo)
+
+    def showPartialInfo(self, info):
+        """
+        Shows the information found so far by a running search, labels not yet known are left as ?
+        :param info: dictionary in the format of get_film_info()'s output
+        """
+        self.setMovieLabels(info['subscene'], info['imdb'])
+
+    def showMovieInfo(self, info):
+        """
+        Shows the information of a searched movie. Information is taken from IMDB, if imdb could not be
+        used movie info is taken from subscene.
+        :param info: dictionary, output of get_film_info()
+        """
+        self.statusLabel.setText("")
+        self.searchButton.setEnabled(True)
+        # If subscene info could not be found, error message is pulled
+        if (info is None):
+            self.showError("Film could not be found")
+            return
+        self.subscene_info = info['subscene']
+        self.setMovieLabels(info['subscene'], info['imdb'], True)
+        # Re-enables OK Button
+        self.searchOkButton.setEnabled(True)
+
+    def setMovieLabels(self, subscene_info, imdb_info, final=False):
+        """
+        Sets the movie info labels. Information is taken from IMDB, if imdb could not be
+        used movie info is taken from subscene.
+        :param subscene_info: dictionary, output of search_for_movie(), or None if subscene has not answered
+        :param imdb_info: dictionary, output of get_movie_info(), or None if it is not known
+        :param final: boolean, if True IMDB information which is not known could not be found
+        """
+        if (imdb_info is not None):
+            # Sets the movie info labels to imdb info
+            self.nameLabel.setText("Title: " + imdb_info['title'])
+            self.yearLabel.setText("Year: " + imdb_info['year'])
+            self.dirLabel.setText("Director: " + imdb_info['director'])
+            self.castLabel.setText("Cast: " + imdb_info['cast'])
+            self.runLabel.setText("Runtime: " + imdb_info['runtime'])
+        # If unsuccessful, movie info is pulled from subscene
+        elif (subscene_info is not None):
+            # Sets movie info labels to subscene info
+            self.nameLabel.setText("Title: " + subscene_info['title'])
+            self.yearLabel.setText("Year: " + str(subscene_info['year']))
+            if final:
                 self.dirLabel.setText("All IMDB Information Could Not Be Found")
                 self.castLabel.setText("")
                 self.runLabel.setText("")
-                self.imdbLabel.setText('<a href=\"' + self.subscene_info['url'] + '\">IMDB</a>')
-                # Re-enables OK Button
-                self.searchOkButton.setEnabled(True)
-        # If subscene info could not be found, error message is pulled
-        else:
-            print("Film could not be found")
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Critical)
-            msg.setText("Film could not be found")
-            msg.setWindowTitle("Error")
-            msg.exec()
+            else:
+                self.dirLabel.setText("Director: ?")
+                self.castLabel.setText("Cast: ?")
+                self.runLabel.setText("Runtime: ?")
+        if (subscene_info is not None):
+            self.imdbLabel.setText('<a href=\"' + subscene_info['url'] + '\">IMDB</a>')
+
+    def searchFailed(self, error):
+        """
+        Shows an error when a search could not be completed
+        :param error: the exception raised by the search
+        """
+        self.statusLabel.setText("")
         self.searchButton.setEnabled(True)
+        self.showError("Film could not be found")
 
     def link(self, linkStr):
         """
@@ -654,17 +882,19 @@ class Gui(QMainWindow):
         """
         # Sets movie title to subscene gathered title
         self.movieTitle = self.subscene_info['title']
-        # Attempts to download subtitle file
-        try:
-            get_sub_files(self.movieTitle)
+        self.searchButton.setEnabled(False)
+        self.searchOkButton.setEnabled(False)
+        # Downloads the subtitle file in the background, see subtitleDownloaded()
+        self.startMovieTask(get_sub_files, self.movieTitle, finished=self.subtitleDownloaded, failed=self.subtitleDownloaded)
+
+    def subtitleDownloaded(self, error=None):
+        """
+        Closes the search dialog and opens the downloaded subtitle file
+        :param error: the exception raised by the download, if it failed
+        """
         # If download fails, warning dialog is opened
-        except (AppError) as error:
-            print("Subtitle Download Failed")
-            msg = QMessageBox()
-            msg.setIcon(QMessageBox.Critical)
-            msg.setText("Subtitle Download Failed")
-            msg.setWindowTitle("Error")
-            msg.exec()
+        if isinstance(error, Exception):
+            self.showError("Subtitle Download Failed")
         self.closeMovieDialog()
         self.openSearchFile()
 
@@ -679,38 +909,38 @@ class Gui(QMainWindow):
         options |= QFileDialog.DontUseNativeDialog
         fileName, _ = QFileDialog.getOpenFileName(self, "Open a Subtitle File",srtpath,"Subtitle Files (*.srt);;All Files (*)", options=options)
         if (fileName):
-            # Attempts to open the subtitle file
-            try:
-                # Sets the subData to data held in selected file
-                self.subData.open_subtitle(fileName)
-                self.listTabs.setVisible(False)
-                # Sets List to raw subtitle text
-                self.setListFile(self.subData.subpath, " ", self.subRawContent, self.countInfo)
-                # Load word_db.db to list
-                self.setListCount(self.subData.dbpath, "# Frequency   Word                                    # Occurences", self.wordCountContent, self.countInfo)
-                # Load word_db.db to list
-                self.setListWord(self.subData.dbpath, "# Word            Word                                    Time (seconds)", self.wordListContent, self.listInfo)
-                self.listTabs.setCurrentIndex(0)
-                self.listTabs.setVisible(True)
-
-                # View the word count graph
-                self.viewWordCount()
-                # Sets main dialog title
-                self.setTitle("Subtitle for \"" + self.movieTitle + "\" opened")
-                # Enables view tab buttons, and makes the graph invisible
-                self.phraseButton.setEnabled(True)
-                self.countButton.setEnabled(True)
-                self.varietyButton.setEnabled(True)
-                self.graphLabel.setVisible(True)
-                self.graphInfo.setVisible(True)
-            # If unsuccessful, error message is created
-            except:
-                print("Subtitle File Could Not Be Opened") # Change to warning dialog
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Critical)
-                msg.setText("Subtitle File Could Not Be Opened")
-                msg.setWindowTitle("Error")
-                msg.exec()
+            # The file is opened in the background, see searchFileOpened()
+            self.startIngestTask(fileName, self.movieTitle, self.searchFileOpened)
+
+    def searchFileOpened(self):
+        """
+        Shows a downloaded subtitle file, once subData holds it
+        """
+        # Attempts to show the subtitle file
+        try:
+            self.listTabs.setVisible(False)
+            # Sets List to raw subtitle text
+            self.setListFile(self.subData.subpath, " ", self.subRawContent, self.countInfo)
+            # Load word_db.db to list
+            self.setListCount(self.subData.dbpath, "# Frequency   Word                                    # Occurences", self.wordCountContent, self.countInfo)
+            # Load word_db.db to list
+            self.setListWord(self.subData.dbpath, "# Word            Word                                    Time (seconds)", self.wordListContent, self.listInfo)
+            self.listTabs.setCurrentIndex(0)
+            self.listTabs.setVisible(True)
+
+            # View the word count graph
+            self.viewWordCount()
+            # Sets main dialog title
+            self.setTitle("Subtitle for \"" + self.movieTitle + "\" opened")
+            # Enables view tab buttons, and makes the graph invisible
+            self.phraseButton.setEnabled(True)
+            self.countButton.setEnabled(True)
+            self.varietyButton.setEnabled(True)
+            self.graphLabel.setVisible(True)
+            self.graphInfo.setVisible(True)
+        # If unsuccessful, error message is created
+        except:
+            self.showError("Subtitle File Could Not Be Opened")
 
 def initSubFileDir():
     """
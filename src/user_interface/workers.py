@@ -0,0 +1,129 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../film_processing")
+import network
+from PyQt5 import QtCore
+
+class NetworkTask(QtCore.QObject):
+    """
+    Runs a function on the network threads, see network.submit(), and reports back through signals.
+    Signals are emitted from the network threads and delivered on the thread the task was created on,
+    so the user interface can be updated from connected slots.
+    """
+    progress = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, fn, *args, **kwargs):
+        """
+        :param fn: function to run, it is passed the cancel and progress keyword arguments in addition to args and kwargs
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelToken = network.CancelToken()
+        self.future = None
+
+    def start(self):
+        """
+        Submits the task, one of finished, failed, or cancelled is emitted once it ends
+        """
+        self.future = network.submit(self.run)
+        self.future.add_done_callback(self.done)
+
+    def run(self):
+        return self.fn(*self.args, cancel=self.cancelToken, progress=self.progress.emit, **self.kwargs)
+
+    def done(self, future):
+        if future.cancelled() or self.cancelToken.cancelled:
+            self.cancelled.emit()
+        elif future.exception() is not None:
+            self.failed.emit(future.exception())
+        else:
+            self.finished.emit(future.result())
+
+    def cancel(self):
+        """
+        Cancels the task. A request already sent is left to finish or time out, and its result is discarded
+        """
+        self.cancelToken.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    def isRunning(self):
+        return (self.future is not None) and (not self.future.done())
+
+class StreamingTask(NetworkTask):
+    """
+    A NetworkTask whose function also reports results found before it ends, through the partial signal.
+    The function is passed the partial keyword argument in addition to cancel and progress
+    """
+    partial = QtCore.pyqtSignal(object)
+
+    def run(self):
+        return self.fn(*self.args, cancel=self.cancelToken, progress=self.progress.emit, partial=self.partial.emit, **self.kwargs)
+
+class IngestSignals(QtCore.QObject):
+    """
+    Signals of an IngestTask, a QRunnable cannot have signals of its own
+    """
+    progress = QtCore.pyqtSignal(int, int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    cancelled = QtCore.pyqtSignal()
+
+class IngestTask(QtCore.QRunnable):
+    """
+    Runs a function reading files on this computer, such as opening a subtitle file, on QThreadPool.globalInstance(),
+    so it does not wait behind network requests. It reports back through the signals of its signals attribute,
+    which are delivered on the thread the task was created on
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        """
+        :param fn: function to run, it is passed the cancel and progress keyword arguments in addition to args and kwargs.
+        progress is called with the number of subtitles read and words written
+        """
+        super().__init__()
+        # The task is kept by the code that started it, so its signals outlive the run
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = IngestSignals()
+        self.cancelToken = network.CancelToken()
+        self.running = False
+
+    def start(self):
+        """
+        Starts the task, one of finished, failed, or cancelled is emitted once it ends
+        """
+        self.running = True
+        QtCore.QThreadPool.globalInstance().start(self)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, cancel=self.cancelToken, progress=self.signals.progress.emit, **self.kwargs)
+        except network.Cancelled:
+            self.running = False
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.running = False
+            self.signals.failed.emit(e)
+        else:
+            self.running = False
+            if self.cancelToken.cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+    def cancel(self):
+        """
+        Cancels the task, it stops at the next check of its cancel token
+        """
+        self.cancelToken.cancel()
+
+    def isRunning(self):
+        return self.running